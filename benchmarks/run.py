@@ -0,0 +1,255 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from logic.corpus import Corpus  # noqa: E402
+from logic.detect import detect_watermark  # noqa: E402
+from logic.embed import add_echo, watermark_to_bipolar  # noqa: E402
+from logic.utils import audio_to_mp3_buffer, cepstrum  # noqa: E402
+
+RESULTS_DIR = ROOT / "output" / "reports" / "benchmarks"
+DURATIONS = [10, 60, 600, 3600]
+RATES = [44100, 48000]
+CHANNELS = [1, 2]
+PATTERNS = [256, 1024]
+ALPHA = 0.01
+DELTA = 75
+QUEFRENCY_LENGTH = 2048
+
+
+def synthetic_audio(seconds: float, rate: int, channels: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    shape = (int(seconds * rate), channels) if channels > 1 else int(seconds * rate)
+    audio = rng.standard_normal(shape, dtype=np.float32)
+    audio *= np.float32(0.1)
+    return audio
+
+
+def corpus_audio(name: str, seconds: float, rate: int, channels: int) -> np.ndarray:
+    with Corpus() as corpus:
+        track, _ = corpus.load(name)
+    if track.ndim > 1:
+        track = track[:, 0]
+    audio = np.resize(track, int(seconds * rate))
+    return np.repeat(audio[:, None], channels, axis=1) if channels > 1 else audio
+
+
+def synthetic_watermark(bits: int) -> str:
+    rng = np.random.default_rng(1)
+    return rng.integers(0, 256, size=bits // 8, dtype=np.uint8).tobytes().hex()
+
+
+def embed_simple(audio, rate, watermark):
+    return add_echo(audio, ALPHA, DELTA)
+
+
+def embed_time_spread(audio, rate, watermark):
+    return add_echo(audio, ALPHA, DELTA, watermark_to_bipolar(watermark))
+
+
+def compute_cepstrum(audio, rate, watermark):
+    return cepstrum(audio)
+
+
+def compute_cepstrum_float32(audio, rate, watermark):
+    return cepstrum(audio, QUEFRENCY_LENGTH, np.float32)
+
+
+def detect_simple(audio, rate, watermark):
+    return detect_watermark(audio, rate, method="simple")
+
+
+def detect_time_spread(audio, rate, watermark):
+    return detect_watermark(audio, rate, expected_watermark_hex=watermark)
+
+
+def mp3_preview(audio, rate, watermark):
+    return audio_to_mp3_buffer(audio, rate)
+
+
+CASES = {
+    "add_echo_simple": (embed_simple, False, False),
+    "add_echo_time_spread": (embed_time_spread, False, True),
+    "cepstrum": (compute_cepstrum, True, False),
+    "cepstrum_float32": (compute_cepstrum_float32, True, False),
+    "detect_simple": (detect_simple, True, False),
+    "detect_time_spread": (detect_time_spread, True, True),
+    "audio_to_mp3_buffer": (mp3_preview, True, False),
+}
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(case: str, params: dict, repeat: int, queue) -> None:
+    func = CASES[case][0]
+    try:
+        shape = (params["seconds"], params["rate"], params["channels"])
+        if params.get("track"):
+            audio = corpus_audio(params["track"], *shape)
+        else:
+            audio = synthetic_audio(*shape)
+        watermark = synthetic_watermark(params["pattern"] or 8)
+        baseline = peak_rss_mb()
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(audio, params["rate"], watermark)
+            times.append(time.perf_counter() - started)
+        queue.put(
+            {
+                "best_s": min(times),
+                "mean_s": float(np.mean(times)),
+                "input_mb": audio.nbytes / 1024**2,
+                "baseline_rss_mb": baseline,
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        )
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def measure(case: str, params: dict, repeat: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=run_case, args=(case, params, repeat, queue))
+    process.start()
+    process.join()
+    if queue.empty():
+        return {"error": f"process exited with code {process.exitcode}"}
+    return queue.get()
+
+
+def iter_params(case: str, args: argparse.Namespace):
+    _, mono_only, uses_pattern = CASES[case]
+    channels = [1] if mono_only else args.channels
+    patterns = args.patterns if uses_pattern else [None]
+    for seconds, rate, channel, pattern in itertools.product(
+        args.durations, args.rates, channels, patterns
+    ):
+        yield {
+            "seconds": seconds,
+            "rate": rate,
+            "channels": channel,
+            "pattern": pattern,
+            "track": args.track,
+        }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> Path:
+    commit = git_commit()
+    results = []
+    for case in args.cases:
+        for params in iter_params(case, args):
+            row = {"case": case, **params, **measure(case, params, args.repeat)}
+            results.append(row)
+            print(_format_row(row), flush=True)
+
+    output = Path(args.output or RESULTS_DIR / f"{commit or 'local'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+    return output
+
+
+def compare(baseline: Path, current: Path, tolerance: float) -> int:
+    def load(path):
+        report = json.loads(path.read_text())
+        return {_case_key(row): row for row in report["results"]}, report["commit"]
+
+    old, old_commit = load(baseline)
+    new, new_commit = load(current)
+    regressions = 0
+    print(f"{old_commit} -> {new_commit}")
+    for key, row in new.items():
+        if key not in old or "error" in row or "error" in old[key]:
+            continue
+        time_ratio = row["best_s"] / old[key]["best_s"]
+        memory_ratio = row["peak_rss_mb"] / old[key]["peak_rss_mb"]
+        flag = ""
+        if time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions += 1
+        name = " ".join(map(str, key))
+        print(f"{name:<55} time x{time_ratio:5.2f}  rss x{memory_ratio:5.2f}{flag}")
+    return 1 if regressions else 0
+
+
+def _case_key(row: dict) -> tuple:
+    key = row["case"], row["seconds"], row["rate"], row["channels"], row["pattern"]
+    return key + (row["track"],) if row.get("track") else key
+
+
+def _format_row(row: dict) -> str:
+    name = " ".join(map(str, _case_key(row)))
+    if "error" in row:
+        return f"{name:<55} ERROR {row['error']}"
+    return f"{name:<55} {row['best_s'] * 1000:10.1f} ms {row['peak_rss_mb']:9.1f} MB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark EchoMark hot paths.")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--durations", nargs="+", type=float, default=DURATIONS)
+    parser.add_argument("--rates", nargs="+", type=int, default=RATES)
+    parser.add_argument("--channels", nargs="+", type=int, default=CHANNELS)
+    parser.add_argument("--patterns", nargs="+", type=int, default=PATTERNS)
+    parser.add_argument(
+        "--track", help="corpus track to loop instead of synthetic noise"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--output", help="JSON file (default: output/reports/benchmarks/<commit>.json)"
+    )
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        type=Path,
+        metavar=("BASELINE", "CURRENT"),
+        help="compare two result files instead of running",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.tolerance))
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
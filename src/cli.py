@@ -0,0 +1,344 @@
+import argparse
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+
+import soundfile as sf
+
+from logic.attacks import ATTACK_FIELDS, DEFAULT_ATTACKS, attack_file, attack_summary
+from logic.batch import (
+    DETECT_FIELDS,
+    EMBED_FIELDS,
+    ResultWriter,
+    detect_file,
+    embed_file,
+    iter_audio_files,
+    read_results,
+    run_parallel,
+)
+from logic.corpus import CORPUS_DIR, LIBROSA_EXAMPLES, Corpus
+from logic.embed import generate_watermark
+from logic.features import FEATURES_DIR, FeatureStore, index_file
+from logic.registry import WatermarkRegistry
+from logic.streaming import StreamingDetector, iter_file_blocks, iter_input_blocks
+
+
+def embed(args: argparse.Namespace) -> None:
+    source_root = Path(args.input)
+
+    with ExitStack() as stack:
+        registry = (
+            stack.enter_context(WatermarkRegistry(args.registry))
+            if args.registry
+            else None
+        )
+        params = {
+            "method": args.method,
+            "output": args.output,
+            "alpha": args.alpha,
+            "delta": args.delta,
+            "watermark": args.watermark,
+            "bits": args.bits,
+        }
+        writer = stack.enter_context(_results(args.results, EMBED_FIELDS, params))
+
+        def jobs():
+            for path in iter_audio_files(source_root):
+                if str(path) in writer.done:
+                    continue
+                relative = (
+                    path.relative_to(source_root) if path != source_root else path.name
+                )
+                watermark = args.watermark
+                if args.method == "time-spread" and watermark is None:
+                    watermark = generate_watermark(args.bits)
+                kwargs = {
+                    "target": str(Path(args.output) / relative),
+                    "alpha": args.alpha,
+                    "delta": args.delta,
+                    "watermark": watermark if args.method == "time-spread" else None,
+                }
+                yield str(path), kwargs
+
+        for row in run_parallel(embed_file, jobs(), args.workers):
+            if registry is not None and row.get("watermark") and not row.get("error"):
+                registry.add(row["watermark"], row["file"], {"output": row["output"]})
+            writer.write(row)
+            _report(row)
+
+
+def detect(args: argparse.Namespace) -> None:
+    lag_range = (args.min_delta, args.max_delta + 1)
+    kwargs = {
+        "method": args.method,
+        "watermark": args.watermark,
+        "registry": args.registry,
+        "lag_range": lag_range,
+        "features": args.features,
+    }
+    if args.method == "time-spread" and not (args.watermark or args.registry):
+        raise SystemExit("time-spread detection needs --watermark or --registry.")
+
+    params = {key: value for key, value in kwargs.items() if key != "features"}
+    with _results(args.results, DETECT_FIELDS, params) as writer:
+        jobs = (
+            (str(path), kwargs)
+            for path in iter_audio_files(args.input)
+            if str(path) not in writer.done
+        )
+        for row in run_parallel(detect_file, jobs, args.workers):
+            writer.write(row)
+            _report(row)
+
+
+def attack(args: argparse.Namespace) -> None:
+    kwargs = {
+        "method": args.method,
+        "watermark": args.watermark,
+        "lag_range": (args.min_delta, args.max_delta + 1),
+    }
+    if args.method == "time-spread" and not args.watermark:
+        raise SystemExit("time-spread detection needs --watermark.")
+
+    with _results(args.results, ATTACK_FIELDS, kwargs, ("file", "attack")) as writer:
+        jobs = (
+            (str(path), {"attack": spec, **kwargs})
+            for path in iter_audio_files(args.input)
+            for spec in args.attacks
+            if (str(path), spec) not in writer.done
+        )
+        for row in run_parallel(attack_file, jobs, args.workers, ("attack",)):
+            writer.write(row)
+            _report(row)
+
+    print(attack_summary(read_results(args.results)).to_string(index=False))
+
+
+def features(args: argparse.Namespace) -> None:
+    jobs = (
+        (str(path), {"features": args.root}) for path in iter_audio_files(args.input)
+    )
+    added = 0
+    for row in run_parallel(index_file, jobs, args.workers):
+        if row.get("error"):
+            _report(row)
+        added += bool(row.get("added"))
+    with FeatureStore(args.root) as store:
+        print(f"Added {added} files, {len(store)} in {args.root}")
+
+
+def corpus(args: argparse.Namespace) -> None:
+    with Corpus(args.root) as store:
+        if args.action == "add":
+            for path in args.items:
+                for file in iter_audio_files(path):
+                    print(f"✓ {store.add_file(file)} <- {file}")
+        elif args.action == "examples":
+            for name in args.items or LIBROSA_EXAMPLES:
+                if name not in store:
+                    store.add_example(name)
+                print(f"✓ {name}")
+        for name in store:
+            info = store.info(name)
+            print(
+                f"{name:<24} {info['rate']:>6} Hz {info['seconds']:8.1f} s  {info['source']}"
+            )
+
+
+def monitor(args: argparse.Namespace) -> None:
+    if args.method == "time-spread" and not args.watermark:
+        raise SystemExit("time-spread detection needs --watermark.")
+    if args.file:
+        rate = sf.info(args.file).samplerate
+        blocks = iter_file_blocks(args.file)
+    else:
+        rate = args.rate
+        blocks = iter_input_blocks(rate, device=args.device)
+
+    detector = StreamingDetector(
+        rate,
+        args.method,
+        args.watermark,
+        window_seconds=args.window,
+        hop_seconds=args.hop,
+        lag_range=(args.min_delta, args.max_delta + 1),
+    )
+    print(f"Monitoring at {rate} Hz, latency {detector.latency_seconds:.2f} s")
+    for event in detector.events(blocks):
+        print(
+            f"{event['event']:>5} {event['start_s']:9.2f} s "
+            f"z={event['z_score']:.2f} delta={event['peak_index']}",
+            flush=True,
+        )
+
+
+def serve(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    from service import create_app
+
+    app = create_app(
+        registry=args.registry,
+        workers=args.workers,
+        max_pending=args.max_pending,
+        max_batch=args.max_batch,
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+def _results(
+    path: str, fields: list[str], params: dict, keys: tuple = ("file",)
+) -> ResultWriter:
+    try:
+        return ResultWriter(path, fields, keys, params)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+
+def _report(row: dict) -> None:
+    if row.get("error"):
+        print(f"✗ {row['file']}: {row['error']}", file=sys.stderr)
+    elif "attack" in row:
+        print(f"{'✓' if row['detected'] else '·'} {row['file']} [{row['attack']}]")
+    elif "detected" in row:
+        print(f"{'✓' if row['detected'] else '·'} {row['file']}")
+    else:
+        print(f"✓ {row['file']} -> {row['output']}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="echomark", description="Batch echo watermarking of audio files."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    embed_parser = commands.add_parser("embed", help="embed watermarks into files")
+    embed_parser.add_argument("input", help="audio file or directory")
+    embed_parser.add_argument("output", help="directory for watermarked files")
+    embed_parser.add_argument(
+        "--method", choices=["simple", "time-spread"], default="time-spread"
+    )
+    embed_parser.add_argument("--alpha", type=float, default=0.01)
+    embed_parser.add_argument("--delta", type=int, default=75)
+    embed_parser.add_argument(
+        "--watermark", help="HEX key for every file (default: new key per file)"
+    )
+    embed_parser.add_argument("--bits", type=int, default=1024)
+    embed_parser.add_argument("--registry", help="registry directory to record keys")
+    embed_parser.set_defaults(func=embed)
+
+    detect_parser = commands.add_parser("detect", help="detect watermarks in files")
+    detect_parser.add_argument("input", help="audio file or directory")
+    detect_parser.add_argument(
+        "--method", choices=["simple", "time-spread"], default="time-spread"
+    )
+    detect_parser.add_argument("--watermark", help="expected HEX key")
+    detect_parser.add_argument("--registry", help="registry directory to search")
+    detect_parser.add_argument("--min-delta", type=int, default=10)
+    detect_parser.add_argument("--max-delta", type=int, default=300)
+    detect_parser.add_argument(
+        "--features", help="feature store directory to read and extend cepstra"
+    )
+    detect_parser.set_defaults(func=detect)
+
+    features_parser = commands.add_parser(
+        "features", help="precompute cepstra of files into a feature store"
+    )
+    features_parser.add_argument("input", help="audio file or directory")
+    features_parser.add_argument("--root", default=str(FEATURES_DIR))
+    features_parser.add_argument(
+        "--workers", type=int, help="number of processes (default: all cores)"
+    )
+    features_parser.set_defaults(func=features)
+
+    attack_parser = commands.add_parser(
+        "attack", help="detect watermarks in degraded copies of files"
+    )
+    attack_parser.add_argument("input", help="watermarked audio file or directory")
+    attack_parser.add_argument(
+        "--method", choices=["simple", "time-spread"], default="time-spread"
+    )
+    attack_parser.add_argument("--watermark", help="expected HEX key")
+    attack_parser.add_argument(
+        "--attacks",
+        nargs="+",
+        default=DEFAULT_ATTACKS,
+        help="attacks as NAME[:VALUE], e.g. mp3:128 noise:20 resample:16000",
+    )
+    attack_parser.add_argument("--min-delta", type=int, default=10)
+    attack_parser.add_argument("--max-delta", type=int, default=300)
+    attack_parser.set_defaults(func=attack)
+
+    corpus_parser = commands.add_parser(
+        "corpus", help="store tracks as memory-mapped arrays for offline use"
+    )
+    corpus_parser.add_argument("action", choices=["add", "examples", "list"])
+    corpus_parser.add_argument(
+        "items", nargs="*", help="files or directories to add, or librosa example names"
+    )
+    corpus_parser.add_argument("--root", default=str(CORPUS_DIR))
+    corpus_parser.set_defaults(func=corpus)
+
+    monitor_parser = commands.add_parser(
+        "monitor", help="watch live input or a file for a watermark"
+    )
+    monitor_parser.add_argument(
+        "--file", help="audio file to stream instead of the live input"
+    )
+    monitor_parser.add_argument("--rate", type=int, default=44100)
+    monitor_parser.add_argument("--device", help="input device name or index")
+    monitor_parser.add_argument(
+        "--method", choices=["simple", "time-spread"], default="time-spread"
+    )
+    monitor_parser.add_argument("--watermark", help="expected HEX key")
+    monitor_parser.add_argument(
+        "--window", type=float, default=2.0, help="seconds of audio per decision"
+    )
+    monitor_parser.add_argument(
+        "--hop", type=float, default=0.5, help="seconds between decisions"
+    )
+    monitor_parser.add_argument("--min-delta", type=int, default=10)
+    monitor_parser.add_argument("--max-delta", type=int, default=300)
+    monitor_parser.set_defaults(func=monitor)
+
+    serve_parser = commands.add_parser("serve", help="run the HTTP detection service")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--registry", help="registry directory to search")
+    serve_parser.add_argument(
+        "--workers", type=int, help="number of processes (default: all cores)"
+    )
+    serve_parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=256,
+        help="requests in progress before new ones get 503",
+    )
+    serve_parser.add_argument(
+        "--max-batch", type=int, default=32, help="detections per batched correlation"
+    )
+    serve_parser.set_defaults(func=serve)
+
+    for command, results in [
+        (embed_parser, "embed_results.jsonl"),
+        (detect_parser, "detect_results.jsonl"),
+        (attack_parser, "attack_results.jsonl"),
+    ]:
+        command.add_argument(
+            "--results",
+            default=results,
+            help="JSONL or CSV file with per-file results; finished files are skipped",
+        )
+        command.add_argument(
+            "--workers", type=int, help="number of processes (default: all cores)"
+        )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
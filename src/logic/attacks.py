@@ -0,0 +1,168 @@
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import soundfile as sf
+from scipy.signal import butter, resample_poly, sosfilt
+
+from logic.batch import _to_builtin
+from logic.detect import detect_watermark
+from logic.utils import audio_to_mp3_buffer, read_audio
+
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+DEFAULT_ATTACKS = [
+    "none",
+    "mp3:320",
+    "mp3:128",
+    "mp3:64",
+    "opus:96",
+    "opus:32",
+    "noise:30",
+    "noise:20",
+    "noise:10",
+    "resample:22050",
+    "resample:16000",
+    "lowpass:8000",
+    "lowpass:4000",
+    "crop:10",
+]
+ATTACK_FIELDS = [
+    "file",
+    "attack",
+    "detected",
+    "peak_index",
+    "peak_value",
+    "z_score",
+    "snr_ratio",
+    "local_max",
+    "seconds",
+    "error",
+]
+
+
+def mp3_roundtrip(audio: np.ndarray, rate: int, bitrate: float = 128) -> np.ndarray:
+    return _decode(audio_to_mp3_buffer(audio, rate, bitrate), rate, len(audio))
+
+
+def opus_roundtrip(audio: np.ndarray, rate: int, bitrate: float = 64) -> np.ndarray:
+    level = np.clip((256 - bitrate) / 250, 0.0, 1.0)
+    return _codec_roundtrip(
+        audio, rate, OPUS_RATES, format="OGG", subtype="OPUS", compression_level=level
+    )
+
+
+def add_noise(audio: np.ndarray, rate: int, snr_db: float = 20) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    power = np.mean(np.square(audio, dtype=np.float64))
+    noise = rng.standard_normal(audio.shape, dtype=np.float32)
+    noise *= np.float32(np.sqrt(power / 10 ** (snr_db / 10)))
+    return audio + noise
+
+
+def resample(audio: np.ndarray, rate: int, target: float = 22050) -> np.ndarray:
+    target = int(target)
+    down = resample_poly(audio, target, rate)
+    return resample_poly(down, rate, target)[: len(audio)].astype(np.float32)
+
+
+def lowpass(audio: np.ndarray, rate: int, cutoff: float = 4000) -> np.ndarray:
+    if not 0 < cutoff < rate / 2:
+        raise ValueError("cutoff must be between 0 and the Nyquist frequency.")
+    sos = butter(8, cutoff, fs=rate, output="sos")
+    return sosfilt(sos, audio, axis=0).astype(np.float32)
+
+
+def crop(audio: np.ndarray, rate: int, seconds: float = 10) -> np.ndarray:
+    length = min(len(audio), int(seconds * rate))
+    start = (len(audio) - length) // 2
+    return audio[start : start + length]
+
+
+ATTACKS = {
+    "none": lambda audio, rate: audio,
+    "mp3": mp3_roundtrip,
+    "opus": opus_roundtrip,
+    "noise": add_noise,
+    "resample": resample,
+    "lowpass": lowpass,
+    "crop": crop,
+}
+
+
+def parse_attack(spec: str) -> tuple[str, float | None]:
+    name, _, value = spec.partition(":")
+    if name not in ATTACKS:
+        raise ValueError(f"Unknown attack: {name}")
+    return name, float(value) if value else None
+
+
+def apply_attack(audio: np.ndarray, rate: int, spec: str) -> np.ndarray:
+    name, value = parse_attack(spec)
+    func = ATTACKS[name]
+    return func(audio, rate) if value is None else func(audio, rate, value)
+
+
+def attack_file(
+    source: str,
+    attack: str,
+    method: str = "time-spread",
+    watermark: str | None = None,
+    lag_range: tuple | None = None,
+) -> dict:
+    started = time.perf_counter()
+    audio, rate = read_audio(source)
+
+    result = detect_watermark(
+        apply_attack(audio, rate, attack),
+        rate,
+        method=method,
+        expected_watermark_hex=watermark,
+        lag_range=lag_range,
+    )
+    row = {"file": source, "attack": attack}
+    for field in ATTACK_FIELDS[2:-2]:
+        row[field] = _to_builtin(result.get(field))
+    row["seconds"] = time.perf_counter() - started
+    return row
+
+
+def attack_summary(results: pd.DataFrame) -> pd.DataFrame:
+    failed = (
+        results["error"].notna()
+        if "error" in results
+        else pd.Series(False, index=results.index)
+    )
+    order = pd.Index(results["attack"].drop_duplicates(), name="attack")
+    attacks = results[~failed].groupby("attack", sort=False)
+    summary = pd.DataFrame(
+        {
+            "files": attacks["file"].nunique(),
+            "detection_rate": attacks["detected"].mean(),
+            "mean_z_score": attacks["z_score"].mean(),
+            "mean_snr_ratio": attacks["snr_ratio"].mean(),
+        }
+    ).reindex(order)
+    summary["files"] = summary["files"].fillna(0).astype(int)
+    summary["failed"] = failed.groupby(results["attack"]).sum().reindex(order)
+    return summary.reset_index()
+
+
+def _codec_roundtrip(
+    audio: np.ndarray, rate: int, codec_rates: tuple, **write_kwargs
+) -> np.ndarray:
+    length = len(audio)
+    codec_rate = min((r for r in codec_rates if r >= rate), default=codec_rates[-1])
+    if codec_rate != rate:
+        audio = resample_poly(audio, codec_rate, rate)
+    buffer = BytesIO()
+    sf.write(buffer, np.clip(audio, -1.0, 1.0), codec_rate, **write_kwargs)
+    buffer.seek(0)
+    return _decode(buffer, rate, length)
+
+
+def _decode(buffer: BytesIO, rate: int, length: int) -> np.ndarray:
+    decoded, codec_rate = sf.read(buffer, dtype="float32")
+    if codec_rate != rate:
+        decoded = resample_poly(decoded, rate, codec_rate).astype(np.float32)
+    return decoded[:length]
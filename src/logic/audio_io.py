@@ -0,0 +1,146 @@
+import warnings
+from contextlib import nullcontext
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+from scipy.io import wavfile
+from scipy.signal import oaconvolve
+
+from logic.embed import watermark_to_bipolar
+from logic.profiling import stage
+
+BLOCK_SIZE = 2**18
+
+
+class BlockEcho:
+    def __init__(
+        self,
+        alpha: float,
+        delta: int,
+        pattern: np.ndarray | None = None,
+        channels: int = 1,
+    ) -> None:
+        if delta <= 0:
+            raise ValueError("delta must be positive.")
+        taps = np.ones(1) if pattern is None else np.asarray(pattern)
+        self.kernel = (alpha * taps).astype(np.float32)
+        self.delta = delta
+        self.history = np.zeros(
+            (delta + len(self.kernel) - 1, channels), dtype=np.float32
+        )
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        x = np.concatenate([self.history, block])
+        if len(self.kernel) == 1:
+            echo = self.kernel[0] * x[: len(block)]
+        else:
+            echo = oaconvolve(
+                x[: len(x) - self.delta], self.kernel[:, None], mode="valid", axes=0
+            )
+        self.history = x[len(x) - len(self.history) :]
+        return block + echo
+
+
+def open_audio(path: str | Path) -> tuple[int, np.ndarray | sf.SoundFile]:
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", wavfile.WavFileWarning)
+            rate, audio = wavfile.read(path, mmap=True)
+    except ValueError:
+        audio = sf.SoundFile(path)
+        return audio.samplerate, audio
+    return rate, audio if audio.ndim == 2 else audio[:, None]
+
+
+def _audio_shape(audio: np.ndarray | sf.SoundFile) -> tuple[int, int]:
+    if isinstance(audio, sf.SoundFile):
+        return audio.frames, audio.channels
+    return audio.shape
+
+
+def iter_blocks(
+    audio: np.ndarray | sf.SoundFile, block_size: int = BLOCK_SIZE, gain: float = 1.0
+) -> Iterator[np.ndarray]:
+    for block in _raw_blocks(audio, block_size):
+        block = np.asarray(block, dtype=np.float32)
+        if gain != 1.0:
+            block = block * np.float32(gain)
+        yield block
+
+
+def stream_peak(
+    audio: np.ndarray | sf.SoundFile, block_size: int = BLOCK_SIZE
+) -> float:
+    peak = 0.0
+    for block in _raw_blocks(audio, block_size):
+        peak = max(peak, float(block.max()), -float(block.min()))
+    return peak
+
+
+def embed_echo_file(
+    source: str | Path,
+    target: str | Path,
+    alpha: float,
+    delta: int,
+    watermark: str | None = None,
+    block_size: int = BLOCK_SIZE,
+    subtype: str | None = None,
+) -> dict:
+    rate, audio = open_audio(source)
+    with audio if isinstance(audio, sf.SoundFile) else nullcontext():
+        n, channels = _audio_shape(audio)
+        subtype = subtype or sf.info(source).subtype
+
+        with stage("peak"):
+            input_peak = stream_peak(audio, block_size)
+        gain = 1.0 / (input_peak + 1e-12)
+        pattern = watermark_to_bipolar(watermark) if watermark else None
+        echo = None
+        if alpha != 0 and delta > 0:
+            echo = BlockEcho(alpha, delta, pattern, channels)
+
+        target = Path(target)
+        staging = target.with_name(target.name + ".part")
+        output_peak = 0.0
+        with (
+            stage("echo") as entry,
+            sf.SoundFile(staging, "w", rate, channels, "FLOAT", format="RF64") as out,
+        ):
+            for block in iter_blocks(audio, block_size, gain):
+                if echo is not None:
+                    block = echo.process(block)
+                output_peak = max(output_peak, float(block.max()), -float(block.min()))
+                out.write(block)
+            if entry is not None:
+                entry.update(
+                    shape=(n, channels), dtype="float32", block_size=block_size
+                )
+
+        with stage("encode"):
+            _copy_scaled(
+                staging, target, 1.0 / max(1.0, output_peak), subtype, block_size
+            )
+        staging.unlink()
+        return {"rate": rate, "samples": n, "channels": channels, "peak": output_peak}
+
+
+def _copy_scaled(
+    source: Path, target: Path, gain: float, subtype: str, block_size: int
+) -> None:
+    with sf.SoundFile(source) as f:
+        with sf.SoundFile(target, "w", f.samplerate, f.channels, subtype) as out:
+            for block in f.blocks(block_size, dtype="float32", always_2d=True):
+                out.write(block * np.float32(gain) if gain != 1.0 else block)
+
+
+def _raw_blocks(
+    audio: np.ndarray | sf.SoundFile, block_size: int
+) -> Iterator[np.ndarray]:
+    if isinstance(audio, sf.SoundFile):
+        audio.seek(0)
+        yield from audio.blocks(block_size, dtype="float32", always_2d=True)
+        return
+    for start in range(0, len(audio), block_size):
+        yield audio[start : start + block_size]
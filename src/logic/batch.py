@@ -0,0 +1,271 @@
+import csv
+import json
+import os
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from logic.audio_io import embed_echo_file
+from logic.detect import (
+    cepstrum_length,
+    detect_from_cepstrum,
+    detect_registered,
+    detect_watermark,
+    rank_registered,
+)
+from logic.features import FeatureStore
+from logic.registry import WatermarkRegistry
+from logic.utils import read_audio
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".aiff", ".aif")
+
+EMBED_FIELDS = [
+    "file",
+    "output",
+    "watermark",
+    "alpha",
+    "delta",
+    "rate",
+    "samples",
+    "channels",
+    "seconds",
+    "error",
+]
+DETECT_FIELDS = [
+    "file",
+    "method",
+    "watermark",
+    "asset",
+    "detected",
+    "peak_index",
+    "peak_value",
+    "threshold",
+    "snr_ratio",
+    "local_max",
+    "seconds",
+    "error",
+]
+
+
+def available_workers() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def iter_audio_files(root: str | Path) -> Iterator[Path]:
+    root = Path(root)
+    if root.is_file():
+        yield root
+        return
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix.lower() in AUDIO_EXTENSIONS:
+            yield path
+
+
+def embed_file(
+    source: str,
+    target: str,
+    alpha: float,
+    delta: int,
+    watermark: str | None = None,
+) -> dict:
+    started = time.perf_counter()
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    info = embed_echo_file(source, target, alpha, delta, watermark)
+    return {
+        "file": source,
+        "output": target,
+        "watermark": watermark,
+        "alpha": alpha,
+        "delta": delta,
+        "rate": info["rate"],
+        "samples": info["samples"],
+        "channels": info["channels"],
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def detect_file(
+    source: str,
+    method: str = "time-spread",
+    watermark: str | None = None,
+    registry: str | None = None,
+    lag_range: tuple | None = None,
+    features: str | None = None,
+) -> dict:
+    started = time.perf_counter()
+    if features is not None:
+        result = _detect_features(
+            source, method, watermark, registry, lag_range, features
+        )
+        return _detect_row(result, source, started)
+    audio, rate = read_audio(source)
+
+    if registry is not None:
+        best = detect_registered(audio, rate, registry, top=1, lag_range=lag_range)
+        result = best.iloc[0].to_dict()
+        result["method"] = "time-spread"
+    else:
+        result = detect_watermark(
+            audio,
+            rate,
+            method=method,
+            expected_watermark_hex=watermark,
+            lag_range=lag_range,
+        )
+        result["watermark"] = watermark
+    return _detect_row(result, source, started)
+
+
+def _detect_features(
+    source: str,
+    method: str,
+    watermark: str | None,
+    registry: str | None,
+    lag_range: tuple | None,
+    features: str,
+) -> dict:
+    with FeatureStore(features) as store:
+        if registry is not None:
+            with WatermarkRegistry(registry) as keys:
+                length = cepstrum_length("time-spread", keys.bits, lag_range=lag_range)
+                cepstrum, rate = store.features(source, length)
+                best = rank_registered(cepstrum, rate, keys, 1, lag_range=lag_range)
+            result = best.iloc[0].to_dict()
+            result["method"] = "time-spread"
+        else:
+            pattern_length = 4 * len(watermark or "")
+            length = cepstrum_length(method, pattern_length, lag_range=lag_range)
+            cepstrum, rate = store.features(source, length)
+            result = detect_from_cepstrum(
+                cepstrum, rate, method, watermark, lag_range=lag_range
+            )
+            result["watermark"] = watermark
+    return result
+
+
+def _detect_row(result: dict, source: str, started: float) -> dict:
+    result.pop("correlation_signal", None)
+    result.pop("channels", None)
+    result = {key: _to_builtin(value) for key, value in result.items()}
+    result.update({"file": source, "seconds": time.perf_counter() - started})
+    return result
+
+
+class ResultWriter:
+    def __init__(
+        self,
+        path: str | Path,
+        fields: list[str],
+        keys: tuple = ("file",),
+        params: dict | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.keys = keys
+        self.params = None if params is None else json.dumps(params, sort_keys=True)
+        self.fields = fields if params is None else [*fields, "params"]
+        self.format = "csv" if self.path.suffix.lower() == ".csv" else "jsonl"
+        self.done = self.__read_done()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self.path.exists() or self.path.stat().st_size == 0
+        self.file = open(self.path, "a", newline="")
+        if self.format == "csv":
+            self.writer = csv.DictWriter(
+                self.file, fieldnames=self.fields, extrasaction="ignore"
+            )
+            if is_new:
+                self.writer.writeheader()
+
+    def write(self, row: dict) -> None:
+        if self.params is not None:
+            row = {**row, "params": self.params}
+        if self.format == "csv":
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+        self.done.add(self.key(row))
+
+    def key(self, row: dict):
+        if len(self.keys) == 1:
+            return row[self.keys[0]]
+        return tuple(str(row.get(key)) for key in self.keys)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __read_done(self) -> set[str]:
+        if not self.path.exists():
+            return set()
+        with open(self.path, newline="") as f:
+            rows = csv.DictReader(f) if self.format == "csv" else _read_jsonl(f)
+            rows = list(rows)
+        if self.params is not None and any(
+            row.get("params") != self.params for row in rows
+        ):
+            raise ValueError(
+                f"{self.path} holds results for other parameters, "
+                "use a new results file."
+            )
+        return {self.key(row) for row in rows if not row.get("error")}
+
+
+def run_parallel(
+    func: Callable[..., dict],
+    jobs: Iterable[tuple[str, dict]],
+    workers: int | None = None,
+    keys: tuple = (),
+) -> Iterator[dict]:
+    workers = workers or available_workers()
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        while True:
+            while len(pending) < 4 * workers:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                source, kwargs = job
+                pending[pool.submit(func, source, **kwargs)] = job
+            if not pending:
+                return
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                source, kwargs = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    row = {"file": source}
+                    row.update((key, kwargs.get(key)) for key in keys)
+                    yield {**row, "error": f"{type(e).__name__}: {e}"}
+
+
+def read_results(path: str | Path) -> pd.DataFrame:
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        return pd.read_csv(path)
+    with open(path) as f:
+        return pd.DataFrame(list(_read_jsonl(f)))
+
+
+def _read_jsonl(f) -> Iterator[dict]:
+    for line in f:
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
+def _to_builtin(value):
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,103 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+
+
+def content_hash(data: bytes | np.ndarray) -> str:
+    if isinstance(data, np.ndarray):
+        header = f"{data.dtype.str}{data.shape}".encode()
+        data = header + np.ascontiguousarray(data).tobytes()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_hash(path: str | Path, chunk_size: int = 2**20) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sizeof(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, BytesIO):
+        return value.getbuffer().nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(sizeof(item) for item in value)
+    if isinstance(value, dict):
+        return sum(sizeof(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__entries
+
+    def get(self, key: Hashable, default=None):
+        with self.__lock:
+            if key not in self.__entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            return self.__entries[key][0]
+
+    def put(self, key: Hashable, value):
+        size = sizeof(value)
+        with self.__lock:
+            if key in self.__entries:
+                self.nbytes -= self.__entries.pop(key)[1]
+            if size > self.max_bytes:
+                return value
+            self.__entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self.__entries.popitem(last=False)
+                self.nbytes -= evicted
+        return value
+
+    def get_or_compute(self, key: Hashable, func: Callable, *args, **kwargs):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.put(key, _freeze(func(*args, **kwargs)))
+        return value
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.nbytes = 0
+
+
+def _freeze(value):
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            _freeze(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _freeze(item)
+    return value
+
+
+_MISSING = object()
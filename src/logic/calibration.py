@@ -0,0 +1,155 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from scipy.stats import rankdata
+
+from logic.batch import available_workers
+from logic.cache import content_hash
+from logic.detect import (
+    cepstrum_length,
+    compute_cepstrum,
+    correlate_patterns,
+    score_correlations,
+)
+from logic.embed import add_echo
+from logic.experiments import load_track
+
+PROFILES_DIR = Path("output/models")
+SCORES = ["z_score", "snr_ratio", "local_ratio"]
+PROFILE_PARAMS = {
+    "z_score": "sigma_factor",
+    "snr_ratio": "snr_threshold",
+    "local_ratio": "local_ratio",
+}
+
+
+def random_patterns(seed: str, count: int, bits: int) -> np.ndarray:
+    rng = np.random.default_rng(int(content_hash(seed.encode()), 16))
+    return 2 * rng.integers(0, 2, size=(count, bits), dtype=np.int8) - 1
+
+
+def pattern_scores(
+    cepstrum: np.ndarray, patterns: np.ndarray, lag_range: tuple | None = None
+) -> np.ndarray:
+    scores = score_correlations(correlate_patterns(cepstrum, patterns, lag_range))
+    local_ratio = scores["peak_value"] / np.maximum(scores["local_max"], 1e-12)
+    return np.column_stack([scores["z_score"], scores["snr_ratio"], local_ratio])
+
+
+def track_scores(
+    track: str,
+    alpha: float,
+    delta: int,
+    bits: int = 1024,
+    wrong_keys: int = 16,
+    lag_range: tuple = (10, 301),
+    max_seconds: float | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    audio, _ = load_track(track, max_seconds)
+    patterns = random_patterns(track, 1 + wrong_keys, bits)
+    length = cepstrum_length("time-spread", bits, lag_range=lag_range)
+    marked = compute_cepstrum(add_echo(audio, alpha, delta, patterns[0]), length=length)
+    clean = compute_cepstrum(audio, length=length)
+
+    marked_scores = pattern_scores(marked, patterns, lag_range)
+    clean_scores = pattern_scores(clean, patterns, lag_range)
+    return marked_scores[:1], np.concatenate([clean_scores, marked_scores[1:]])
+
+
+def collect_scores(
+    tracks: list[str],
+    alpha: float,
+    delta: int,
+    bits: int = 1024,
+    wrong_keys: int = 16,
+    lag_range: tuple = (10, 301),
+    max_seconds: float | None = None,
+    workers: int | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    per_track = 1 + 2 * wrong_keys
+    positives = np.empty((len(tracks), len(SCORES)), dtype=np.float64)
+    negatives = np.empty((len(tracks) * per_track, len(SCORES)), dtype=np.float64)
+    with ProcessPoolExecutor(max_workers=workers or available_workers()) as pool:
+        results = pool.map(
+            track_scores,
+            tracks,
+            *(
+                [value] * len(tracks)
+                for value in (alpha, delta, bits, wrong_keys, lag_range, max_seconds)
+            ),
+        )
+        for i, (positive, negative) in enumerate(results):
+            positives[i] = positive
+            negatives[i * per_track : (i + 1) * per_track] = negative
+    return positives, negatives
+
+
+def roc_curve(
+    positives: np.ndarray, negatives: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    scores = np.concatenate([positives, negatives])
+    labels = np.concatenate([np.ones(len(positives)), np.zeros(len(negatives))])
+    order = np.argsort(scores, kind="stable")[::-1]
+    scores, labels = scores[order], labels[order]
+
+    last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tpr = np.cumsum(labels)[last] / max(len(positives), 1)
+    fpr = np.cumsum(1 - labels)[last] / max(len(negatives), 1)
+    return np.r_[0.0, fpr], np.r_[0.0, tpr], np.r_[np.inf, scores[last]]
+
+
+def auroc(positives: np.ndarray, negatives: np.ndarray) -> float:
+    if len(positives) == 0 or len(negatives) == 0:
+        raise ValueError("Both positive and negative scores are required.")
+    ranks = rankdata(np.concatenate([positives, negatives]))
+    n_pos, n_neg = len(positives), len(negatives)
+    return float((ranks[:n_pos].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+def threshold_at_fpr(negatives: np.ndarray, target_fpr: float) -> float:
+    if not 0 < target_fpr < 1:
+        raise ValueError("target_fpr must be between 0 and 1.")
+    return float(np.quantile(negatives, 1 - target_fpr, method="higher"))
+
+
+def calibrate(
+    positives: np.ndarray,
+    negatives: np.ndarray,
+    target_fpr: float = 1e-3,
+    lag_range: tuple | None = None,
+) -> dict:
+    thresholds = np.array(
+        [threshold_at_fpr(negatives[:, i], target_fpr) for i in range(len(SCORES))]
+    )
+    profile = {
+        PROFILE_PARAMS[name]: float(value) for name, value in zip(SCORES, thresholds)
+    }
+    profile.update(
+        {
+            "target_fpr": target_fpr,
+            "true_positive_rate": float(np.all(positives > thresholds, axis=1).mean()),
+            "false_positive_rate": float(np.all(negatives > thresholds, axis=1).mean()),
+            "auroc": {
+                name: auroc(positives[:, i], negatives[:, i])
+                for i, name in enumerate(SCORES)
+            },
+            "positives": len(positives),
+            "negatives": len(negatives),
+        }
+    )
+    if lag_range is not None:
+        profile["lag_range"] = list(lag_range)
+    return profile
+
+
+def save_profile(profile: dict, path: str | Path | None = None) -> Path:
+    path = Path(path or PROFILES_DIR / "detector_profile.json")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(profile, indent=2))
+    return path
+
+
+def load_profile(path: str | Path | None = None) -> dict:
+    return json.loads(Path(path or PROFILES_DIR / "detector_profile.json").read_text())
@@ -0,0 +1,157 @@
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+
+from logic.utils import normalize_audio, read_audio
+
+CORPUS_DIR = Path("data/1_interim/corpus")
+DATABASE_NAME = "index.sqlite"
+LIBROSA_EXAMPLES = [
+    "brahms",
+    "choice",
+    "fishin",
+    "humpback",
+    "libri1",
+    "libri2",
+    "libri3",
+    "nutcracker",
+    "pistachio",
+    "robin",
+    "sweetwaltz",
+    "trumpet",
+    "vibeace",
+]
+
+
+class Corpus:
+    def __init__(self, root: str | Path = CORPUS_DIR) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(
+            self.root / DATABASE_NAME, timeout=60, isolation_level=None
+        )
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS tracks (
+                name TEXT PRIMARY KEY,
+                rate INTEGER NOT NULL,
+                samples INTEGER NOT NULL,
+                channels INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                source TEXT,
+                added_at TEXT NOT NULL
+            );
+            """)
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    def __contains__(self, name: str) -> bool:
+        return self.__lookup(name) is not None
+
+    def __iter__(self):
+        rows = self.connection.execute("SELECT name FROM tracks ORDER BY name")
+        return iter([row["name"] for row in rows])
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "Corpus":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def path(self, name: str) -> Path:
+        return self.root / f"{name}.npy"
+
+    def info(self, name: str) -> dict:
+        found = self.__lookup(name)
+        if found is None:
+            raise ValueError(f"Track {name!r} is not in the corpus at {self.root}.")
+        return dict(found)
+
+    def load(self, name: str) -> tuple[np.ndarray, int]:
+        rate = self.info(name)["rate"]
+        return np.load(self.path(name), mmap_mode="r"), rate
+
+    def add(
+        self, name: str, audio: np.ndarray, rate: int, source: str | None = None
+    ) -> Path:
+        if not re.fullmatch(r"[\w.-]+", name):
+            raise ValueError("Track names may only contain letters, digits, . - _")
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        path = self.path(name)
+        staging = NamedTemporaryFile(dir=self.root, suffix=".part", delete=False)
+        try:
+            with staging:
+                np.save(staging, audio)
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                os.replace(staging.name, path)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        name,
+                        int(rate),
+                        len(audio),
+                        1 if audio.ndim == 1 else audio.shape[1],
+                        len(audio) / rate,
+                        source,
+                        datetime.now(timezone.utc).isoformat(),
+                    ),
+                )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+        finally:
+            Path(staging.name).unlink(missing_ok=True)
+        return path
+
+    def add_file(self, path: str | Path, name: str | None = None) -> str:
+        path = Path(path)
+        name = name or path.stem
+        audio, rate = read_audio(path)
+        self.add(name, audio, rate, str(path))
+        return name
+
+    def add_example(self, name: str) -> str:
+        import librosa
+
+        audio, rate = librosa.load(librosa.example(name, hq=True), sr=None, mono=True)
+        self.add(name, normalize_audio(audio), rate, f"librosa:{name}")
+        return name
+
+    def example(self, name: str) -> tuple[np.ndarray, int]:
+        if name not in self:
+            self.add_example(name)
+        return self.load(name)
+
+    def __lookup(self, name: str) -> sqlite3.Row | None:
+        return self.connection.execute(
+            "SELECT * FROM tracks WHERE name = ?", (name,)
+        ).fetchone()
+
+
+def is_corpus_track(path: str | Path) -> bool:
+    path = Path(path)
+    return path.suffix == ".npy" and (path.parent / DATABASE_NAME).exists()
+
+
+def read_track(path: str | Path) -> tuple[np.ndarray, int]:
+    path = Path(path)
+    with Corpus(path.parent) as corpus:
+        return corpus.load(path.stem)
+
+
+def corpus_files(root: str | Path) -> list[str]:
+    if not (Path(root) / DATABASE_NAME).exists():
+        return []
+    with Corpus(root) as corpus:
+        return [str(corpus.path(name)) for name in corpus]
@@ -1,6 +1,316 @@
+from collections.abc import Iterator
+from contextlib import ExitStack, nullcontext
+from pathlib import Path
+
 import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import get_window, oaconvolve
+
+from logic.embed import watermark_to_bipolar
+from logic.profiling import profiled, record, stage
+from logic.registry import WatermarkRegistry
+from logic.utils import (
+    FRAME_SIZE,
+    averaged_cepstrum,
+    cepstrum as cepstrum_fun,
+    truncated_cepstra,
+)
+
+LOCAL_WINDOW = 50
+MATMUL_LIMIT = 2**22
+SEGMENT_SECONDS = 2.0
+SEGMENT_HOP_SECONDS = 0.5
+SEGMENT_BATCH = 512
+CHANNEL_FIELDS = ["detected", "peak_index", "peak_value", "z_score", "snr_ratio"]
+ZOOM_LAGS = 50
+
+
+def lag_bounds(
+    signal_length: int, pattern_length: int, lag_range: tuple | None = None
+) -> tuple[int, int]:
+    n_lags = signal_length - pattern_length + 1
+    start, stop = lag_range if lag_range is not None else (0, n_lags)
+    return max(0, start), min(n_lags, stop)
+
+
+def correlate_patterns(
+    signal: np.ndarray, patterns: np.ndarray, lag_range: tuple | None = None
+) -> np.ndarray:
+    patterns = np.atleast_2d(np.asarray(patterns, dtype=np.float64))
+    n_keys, length = patterns.shape
+    start, stop = lag_bounds(len(signal), length, lag_range)
+    if stop <= start:
+        return np.empty((n_keys, 0), dtype=np.float64)
+    segment = np.asarray(signal[start : stop + length - 1], dtype=np.float64)
+    if (stop - start) * length <= MATMUL_LIMIT:
+        return patterns @ sliding_window_view(segment, length).T
+    return oaconvolve(segment[None, :], patterns[:, ::-1], mode="valid", axes=1)
+
+
+def correlate_pattern(
+    signal: np.ndarray, pattern: np.ndarray, lag_range: tuple | None = None
+) -> np.ndarray:
+    return correlate_patterns(signal, pattern, lag_range)[0]
+
+
+def score_correlations(
+    corr: np.ndarray,
+    sigma_factor: float = 4.0,
+    snr_threshold: float = 5.0,
+    local_ratio: float = 2.0,
+) -> dict:
+    rows = np.arange(len(corr))
+    peak_idx = np.argmax(corr, axis=1)
+    peak_val = corr[rows, peak_idx]
+
+    mu = np.mean(corr, axis=1)
+    sigma = np.std(corr, axis=1)
+    threshold = mu + sigma_factor * sigma
+    z_score = (peak_val - mu) / (sigma + 1e-12)
+    snr_ratio = peak_val / (np.mean(np.abs(corr), axis=1) + 1e-12)
+
+    left_max = _neighbour_max(corr, peak_idx, np.arange(-LOCAL_WINDOW, 0))
+    right_max = _neighbour_max(corr, peak_idx, np.arange(1, LOCAL_WINDOW))
+    local_max = np.maximum(left_max, right_max)
+
+    detected = (
+        (peak_val > threshold)
+        & (snr_ratio > snr_threshold)
+        & (peak_val > local_ratio * local_max)
+    )
+    return {
+        "peak_index": peak_idx,
+        "peak_value": peak_val,
+        "threshold": threshold,
+        "z_score": z_score,
+        "snr_ratio": snr_ratio,
+        "local_max": local_max,
+        "detected": detected,
+    }
+
+
+def _neighbour_max(
+    corr: np.ndarray, peak_idx: np.ndarray, offsets: np.ndarray
+) -> np.ndarray:
+    idx = peak_idx[:, None] + offsets
+    valid = (idx >= 0) & (idx < corr.shape[1])
+    values = np.take_along_axis(corr, np.clip(idx, 0, corr.shape[1] - 1), axis=1)
+    values = np.where(valid, values, -np.inf).max(axis=1)
+    return np.where(np.isfinite(values), values, 0.0)
+
+
+def compute_cepstrum(
+    audio: np.ndarray,
+    frame_size: int | None = None,
+    hop: int | None = None,
+    window: str = "hann",
+    length: int | None = None,
+    dtype: type = np.float64,
+) -> np.ndarray:
+    if audio.ndim not in (1, 2):
+        raise ValueError("Audio must be a 1D or (samples, channels) numpy array.")
+    with stage("cepstrum") as entry:
+        if frame_size is None:
+            cepstrum = cepstrum_fun(audio, length, dtype)
+        elif audio.ndim == 2:
+            cepstrum = np.stack(
+                [
+                    averaged_cepstrum(channel, frame_size, hop, window)[:length]
+                    for channel in audio.T
+                ],
+                axis=1,
+            )
+        else:
+            cepstrum = averaged_cepstrum(audio, frame_size, hop, window)[:length]
+        record(entry, cepstrum, input_bytes=audio.nbytes)
+    return cepstrum
+
+
+def cepstrum_length(
+    method: str,
+    pattern_length: int,
+    search_range: tuple = (20, 500),
+    lag_range: tuple | None = None,
+) -> int | None:
+    if method == "simple":
+        return search_range[1]
+    if lag_range is None:
+        return None
+    return lag_range[1] + pattern_length - 1
+
+
+def fuse_cepstra(cepstra: np.ndarray) -> np.ndarray:
+    return cepstra.mean(axis=1) if cepstra.ndim == 2 else cepstra
+
+
+def lag_segment(
+    cepstrum: np.ndarray, pattern_length: int, lag_range: tuple | None = None
+) -> tuple[np.ndarray, int]:
+    start, stop = lag_bounds(len(cepstrum), pattern_length, lag_range)
+    return cepstrum[start : max(start, stop + pattern_length - 1)], start
+
+
+def correlate_segments(segments: np.ndarray, patterns: np.ndarray) -> np.ndarray:
+    segments = np.atleast_2d(np.asarray(segments, dtype=np.float64))
+    patterns = np.atleast_2d(np.asarray(patterns, dtype=np.float64))
+    n_lags = segments.shape[1] - patterns.shape[1] + 1
+    if n_lags <= 0:
+        return np.empty((len(segments), len(patterns), 0), dtype=np.float64)
+    if len(segments) * n_lags * patterns.shape[1] <= MATMUL_LIMIT:
+        windows = sliding_window_view(segments, patterns.shape[1], axis=1)
+        return patterns @ windows.transpose(0, 2, 1)
+    return oaconvolve(
+        segments[:, None, :], patterns[None, :, ::-1], mode="valid", axes=2
+    )
+
+
+def rank_segments(
+    segments: np.ndarray,
+    offset: int,
+    patterns: np.ndarray,
+    sigma_factor: float = 4.0,
+    snr_threshold: float = 5.0,
+    local_ratio: float = 2.0,
+) -> list[pd.DataFrame]:
+    corr = correlate_segments(segments, patterns)
+    n_segments, n_keys, n_lags = corr.shape
+    if n_lags == 0:
+        raise ValueError("Correlation signal is empty.")
+
+    scores = score_correlations(
+        corr.reshape(n_segments * n_keys, n_lags),
+        sigma_factor,
+        snr_threshold,
+        local_ratio,
+    )
+    scores["peak_index"] = scores["peak_index"] + offset
+    return [
+        pd.DataFrame(
+            {
+                name: values[i * n_keys : (i + 1) * n_keys]
+                for name, values in scores.items()
+            }
+        )
+        for i in range(n_segments)
+    ]
+
+
+def rank_patterns(
+    cepstrum: np.ndarray,
+    rate: int,
+    patterns: np.ndarray,
+    lag_range: tuple | None = None,
+    sigma_factor: float = 4.0,
+    snr_threshold: float = 5.0,
+    local_ratio: float = 2.0,
+) -> pd.DataFrame:
+    segment, offset = lag_segment(cepstrum, patterns.shape[1], lag_range)
+    table = rank_segments(
+        segment, offset, patterns, sigma_factor, snr_threshold, local_ratio
+    )[0]
+    table.insert(1, "peak_time_s", table["peak_index"] / rate)
+    return table
+
+
+def detect_watermarks(
+    audio: np.ndarray,
+    rate: int,
+    watermarks: list[str],
+    patterns: np.ndarray | None = None,
+    lag_range: tuple = (10, 301),
+    sigma_factor: float = 4.0,
+    snr_threshold: float = 5.0,
+    local_ratio: float = 2.0,
+    frame_size: int | None = None,
+    hop: int | None = None,
+    window: str = "hann",
+) -> pd.DataFrame:
+    if patterns is None:
+        patterns = np.stack([watermark_to_bipolar(wm) for wm in watermarks])
+    if len(patterns) != len(watermarks):
+        raise ValueError("patterns must have one row per watermark.")
+    length = cepstrum_length("time-spread", patterns.shape[1], lag_range=lag_range)
+    cepstrum = fuse_cepstra(compute_cepstrum(audio, frame_size, hop, window, length))
+
+    table = rank_patterns(
+        cepstrum, rate, patterns, lag_range, sigma_factor, snr_threshold, local_ratio
+    )
+    table.insert(0, "watermark", list(watermarks))
+    return table.sort_values(
+        ["detected", "snr_ratio"], ascending=False, ignore_index=True
+    )
+
+
+def detect_registered(
+    audio: np.ndarray,
+    rate: int,
+    registry: WatermarkRegistry | str | Path,
+    top: int | None = 20,
+    key_batch: int = 4096,
+    lag_range: tuple = (10, 301),
+    sigma_factor: float = 4.0,
+    snr_threshold: float = 5.0,
+    local_ratio: float = 2.0,
+    frame_size: int | None = None,
+    hop: int | None = None,
+    window: str = "hann",
+) -> pd.DataFrame:
+    with ExitStack() as stack:
+        if not isinstance(registry, WatermarkRegistry):
+            registry = stack.enter_context(WatermarkRegistry(registry))
+        length = cepstrum_length("time-spread", registry.bits, lag_range=lag_range)
+        cepstrum = compute_cepstrum(audio, frame_size, hop, window, length)
+        return rank_registered(
+            fuse_cepstra(cepstrum),
+            rate,
+            registry,
+            top,
+            key_batch,
+            lag_range,
+            sigma_factor,
+            snr_threshold,
+            local_ratio,
+        )
+
+
+def rank_registered(
+    cepstrum: np.ndarray,
+    rate: int,
+    registry: WatermarkRegistry | str | Path,
+    top: int | None = 20,
+    key_batch: int = 4096,
+    lag_range: tuple = (10, 301),
+    sigma_factor: float = 4.0,
+    snr_threshold: float = 5.0,
+    local_ratio: float = 2.0,
+) -> pd.DataFrame:
+    with ExitStack() as stack:
+        if not isinstance(registry, WatermarkRegistry):
+            registry = stack.enter_context(WatermarkRegistry(registry))
+        tables = []
+        for start in range(0, len(registry), key_batch):
+            table = rank_patterns(
+                cepstrum,
+                rate,
+                registry.patterns(start, start + key_batch),
+                lag_range,
+                sigma_factor,
+                snr_threshold,
+                local_ratio,
+            )
+            table.insert(0, "row", np.arange(start, start + len(table)))
+            tables.append(table)
+        if not tables:
+            raise ValueError("Registry is empty.")
 
-from logic.utils import cepstrum as cepstrum_fun
+        table = pd.concat(tables, ignore_index=True)
+        table = table.sort_values(["detected", "snr_ratio"], ascending=False)
+        table = table.head(top) if top is not None else table
+        records = registry.records(table["row"])
+    table.insert(1, "watermark", [record["watermark"] for record in records])
+    table.insert(2, "asset", [record["asset"] for record in records])
+    return table.reset_index(drop=True)
 
 
 def detect_watermark(
@@ -12,10 +322,79 @@ def detect_watermark(
     sigma_factor: float = 4.0,
     snr_threshold: float = 5.0,
     local_ratio: float = 2.0,
+    frame_size: int | None = None,
+    hop: int | None = None,
+    window: str = "hann",
+    lag_range: tuple | None = None,
+    profile: dict | None = None,
+    fusion: str = "mean",
+    dtype: type = np.float64,
+    instrument: bool = False,
+    envelope: int | None = None,
 ) -> dict:
-    if audio.ndim != 1:
-        raise ValueError("Audio must be mono (1D numpy array).")
-    cepstrum = cepstrum_fun(audio)
+    length = cepstrum_length(
+        method,
+        4 * len(expected_watermark_hex or ""),
+        search_range,
+        (profile or {}).get("lag_range", lag_range),
+    )
+    params = (
+        rate,
+        method,
+        expected_watermark_hex,
+        search_range,
+        sigma_factor,
+        snr_threshold,
+        local_ratio,
+        lag_range,
+        profile,
+        envelope,
+    )
+    with profiled() if instrument else nullcontext() as profiler:
+        cepstrum = compute_cepstrum(audio, frame_size, hop, window, length, dtype)
+        if cepstrum.ndim == 1:
+            result = detect_from_cepstrum(cepstrum, *params)
+        else:
+            result = _detect_channels(cepstrum, params, fusion)
+    if profiler is not None:
+        result["performance"] = profiler.stages
+    return result
+
+
+def _detect_channels(cepstrum: np.ndarray, params: tuple, fusion: str) -> dict:
+    channels = [detect_from_cepstrum(channel, *params) for channel in cepstrum.T]
+    if fusion == "mean":
+        result = detect_from_cepstrum(fuse_cepstra(cepstrum), *params)
+    elif fusion == "max":
+        result = dict(max(channels, key=lambda channel: channel.get("z_score", 0.0)))
+    else:
+        raise ValueError("fusion must be 'mean' or 'max'.")
+    result["fusion"] = fusion
+    result["channels"] = [
+        {"channel": i, **{key: channel.get(key) for key in CHANNEL_FIELDS}}
+        for i, channel in enumerate(channels)
+    ]
+    return result
+
+
+def detect_from_cepstrum(
+    cepstrum: np.ndarray,
+    rate: int,
+    method: str = "time-spread",
+    expected_watermark_hex: str = None,
+    search_range: tuple = (20, 500),
+    sigma_factor: float = 4.0,
+    snr_threshold: float = 5.0,
+    local_ratio: float = 2.0,
+    lag_range: tuple | None = None,
+    profile: dict | None = None,
+    envelope: int | None = None,
+) -> dict:
+    if profile is not None:
+        sigma_factor = profile.get("sigma_factor", sigma_factor)
+        snr_threshold = profile.get("snr_threshold", snr_threshold)
+        local_ratio = profile.get("local_ratio", local_ratio)
+        lag_range = profile.get("lag_range", lag_range)
 
     result = {"method": method, "detected": False}
 
@@ -26,15 +405,18 @@ def detect_watermark(
             result["error"] = "Cepstrum segment is empty."
             return result
 
-        peak_idx = np.argmax(segment) + start
-        peak_val = cepstrum[peak_idx]
+        with stage("score") as entry:
+            peak_idx = np.argmax(segment) + start
+            peak_val = cepstrum[peak_idx]
 
-        mu = np.mean(segment)
-        sigma = np.std(segment)
-        threshold = mu + sigma_factor * sigma
-        snr_ratio = peak_val / (np.mean(np.abs(segment)) + 1e-12)
+            mu = np.mean(segment)
+            sigma = np.std(segment)
+            threshold = mu + sigma_factor * sigma
+            snr_ratio = peak_val / (np.mean(np.abs(segment)) + 1e-12)
 
-        detected = peak_val > threshold and snr_ratio > snr_threshold
+            detected = peak_val > threshold and snr_ratio > snr_threshold
+            z_score = (peak_val - mu) / (sigma + 1e-12)
+            record(entry, segment, peak_value=peak_val, threshold=threshold)
 
         result.update(
             {
@@ -42,6 +424,7 @@ def detect_watermark(
                 "peak_time_s": float(peak_idx / rate),
                 "peak_value": float(peak_val),
                 "threshold": float(threshold),
+                "z_score": float(z_score),
                 "snr_ratio": float(snr_ratio),
                 "detected": detected,
             }
@@ -53,51 +436,219 @@ def detect_watermark(
                 "expected_watermark_hex is required for time-spread detection."
             )
 
-        watermark_bytes = bytes.fromhex(expected_watermark_hex)
-        bits = np.unpackbits(np.frombuffer(watermark_bytes, dtype=np.uint8))
-        p_bipolar = 2 * bits - 1
+        p_bipolar = watermark_to_bipolar(expected_watermark_hex)
 
-        corr = np.correlate(cepstrum, p_bipolar, mode="valid")
+        with stage("correlate") as entry:
+            corr = correlate_pattern(cepstrum, p_bipolar, lag_range)
+            record(entry, corr)
         if len(corr) == 0:
             result["error"] = "Correlation signal is empty."
             return result
+        offset = lag_bounds(len(cepstrum), len(p_bipolar), lag_range)[0]
 
-        peak_idx = np.argmax(corr)
-        peak_val = corr[peak_idx]
-
-        mu = np.mean(corr)
-        sigma = np.std(corr)
-        threshold = mu + sigma_factor * sigma
-        snr_ratio = peak_val / (np.mean(np.abs(corr)) + 1e-12)
-
-        win = 50
-        left = max(0, peak_idx - win)
-        right = min(len(corr), peak_idx + win)
-
-        left_max = np.max(corr[left:peak_idx]) if peak_idx > left else 0
-        right_max = np.max(corr[peak_idx + 1 : right]) if right > peak_idx + 1 else 0
-        local_max = max(left_max, right_max)
-
-        detected = (
-            peak_val > threshold
-            and snr_ratio > snr_threshold
-            and peak_val > local_ratio * local_max
-        )
+        with stage("score") as entry:
+            scores = score_correlations(
+                corr[None, :], sigma_factor, snr_threshold, local_ratio
+            )
+            record(
+                entry,
+                corr,
+                peak_value=scores["peak_value"][0],
+                threshold=scores["threshold"][0],
+            )
+        peak_idx = scores["peak_index"][0]
 
         result.update(
             {
-                "peak_index": int(peak_idx),
-                "peak_time_s": float(peak_idx / rate),
-                "peak_value": float(peak_val),
-                "threshold": float(threshold),
-                "snr_ratio": float(snr_ratio),
-                "local_max": float(local_max),
-                "detected": detected,
-                "correlation_signal": corr,
+                "peak_index": int(peak_idx + offset),
+                "peak_time_s": float((peak_idx + offset) / rate),
+                "peak_value": float(scores["peak_value"][0]),
+                "threshold": float(scores["threshold"][0]),
+                "z_score": float(scores["z_score"][0]),
+                "snr_ratio": float(scores["snr_ratio"][0]),
+                "local_max": float(scores["local_max"][0]),
+                "detected": bool(scores["detected"][0]),
+                "correlation_offset": offset,
             }
         )
+        if envelope is None:
+            result["correlation_signal"] = corr
+        else:
+            result["correlation_length"] = len(corr)
+            result["correlation_envelope"] = correlation_envelope(
+                corr, offset, envelope
+            )
+            result["correlation_zoom"] = correlation_zoom(corr, offset, peak_idx)
 
     else:
         raise ValueError("method must be 'simple' or 'time-spread'.")
 
     return result
+
+
+def correlation_envelope(corr: np.ndarray, offset: int, points: int) -> pd.DataFrame:
+    if points <= 0:
+        raise ValueError("points must be positive.")
+    edges = np.linspace(0, len(corr), min(points, len(corr)) + 1).astype(int)[:-1]
+    return pd.DataFrame(
+        {
+            "lag": edges + offset,
+            "min": np.minimum.reduceat(corr, edges),
+            "max": np.maximum.reduceat(corr, edges),
+        }
+    )
+
+
+def correlation_zoom(
+    corr: np.ndarray, offset: int, peak_index: int, radius: int = ZOOM_LAGS
+) -> pd.DataFrame:
+    start = max(0, peak_index - radius)
+    stop = min(len(corr), peak_index + radius + 1)
+    return pd.DataFrame(
+        {"lag": np.arange(start, stop) + offset, "value": corr[start:stop]}
+    )
+
+
+def iter_window_cepstra(
+    audio: np.ndarray,
+    window_frames: int,
+    step_frames: int,
+    length: int,
+    frame_size: int = FRAME_SIZE,
+    window: str = "hann",
+    batch: int = SEGMENT_BATCH,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    hop = frame_size // 2
+    if len(audio) < frame_size:
+        audio = np.pad(audio, (0, frame_size - len(audio)))
+    frames = sliding_window_view(audio, frame_size)[::hop]
+    taper = get_window(window, frame_size, fftbins=True).astype(np.float32)
+
+    starts = np.arange(0, max(len(frames) - window_frames, 0) + 1, step_frames)
+    needed = min(starts[-1] + window_frames, len(frames))
+    carry, first, done = None, 0, 0
+    while first < needed:
+        last = min(first + batch, needed)
+        ceps = truncated_cepstra(frames[first:last], taper, length)
+        if carry is not None:
+            ceps = np.concatenate([carry, ceps])
+        offset = last - len(ceps)
+        ready = (
+            len(starts)
+            if last == needed
+            else np.searchsorted(starts + window_frames, last, side="right")
+        )
+        chunk = starts[done:ready]
+        if len(chunk):
+            total = np.zeros((len(ceps) + 1, length), dtype=np.float64)
+            np.cumsum(ceps, axis=0, out=total[1:])
+            begin = chunk - offset
+            end = np.minimum(begin + window_frames, len(ceps))
+            yield chunk, (total[end] - total[begin]) / (end - begin)[:, None]
+        done = ready
+        if done == len(starts):
+            return
+        first = starts[done]
+        if first < last:
+            carry, first = ceps[first - offset :], last
+        else:
+            carry = None
+
+
+def segment_pattern(method: str, expected_watermark_hex: str | None) -> np.ndarray:
+    if method == "time-spread":
+        if expected_watermark_hex is None:
+            raise ValueError(
+                "expected_watermark_hex is required for time-spread detection."
+            )
+        return watermark_to_bipolar(expected_watermark_hex).astype(np.float64)
+    if method == "simple":
+        return np.ones(1)
+    raise ValueError("method must be 'simple' or 'time-spread'.")
+
+
+def segment_frames(
+    rate: int, window_seconds: float, hop_seconds: float, frame_size: int
+) -> tuple[int, int]:
+    hop = frame_size // 2
+    window_frames = max(1, round((window_seconds * rate - frame_size) / hop) + 1)
+    step_frames = max(1, round(hop_seconds * rate / hop))
+    return window_frames, step_frames
+
+
+def detect_segments(
+    audio: np.ndarray,
+    rate: int,
+    method: str = "time-spread",
+    expected_watermark_hex: str | None = None,
+    window_seconds: float = SEGMENT_SECONDS,
+    hop_seconds: float = SEGMENT_HOP_SECONDS,
+    lag_range: tuple = (10, 301),
+    sigma_factor: float = 4.0,
+    snr_threshold: float = 5.0,
+    local_ratio: float = 2.0,
+    frame_size: int = FRAME_SIZE,
+    window: str = "hann",
+    profile: dict | None = None,
+) -> dict:
+    if profile is not None:
+        sigma_factor = profile.get("sigma_factor", sigma_factor)
+        snr_threshold = profile.get("snr_threshold", snr_threshold)
+        local_ratio = profile.get("local_ratio", local_ratio)
+        lag_range = profile.get("lag_range", lag_range)
+    if audio.ndim == 2:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    if audio.ndim != 1:
+        raise ValueError("Audio must be a 1D or (samples, channels) numpy array.")
+    pattern = segment_pattern(method, expected_watermark_hex)
+
+    hop = frame_size // 2
+    start, stop = lag_range
+    length = stop + len(pattern) - 1
+    if length > hop:
+        raise ValueError("lag_range and pattern must fit in half a frame.")
+    window_frames, step_frames = segment_frames(
+        rate, window_seconds, hop_seconds, frame_size
+    )
+
+    tables = []
+    for starts, cepstra in iter_window_cepstra(
+        audio, window_frames, step_frames, length, frame_size, window
+    ):
+        corr = oaconvolve(cepstra[:, start:], pattern[None, ::-1], "valid", axes=1)
+        scores = score_correlations(corr, sigma_factor, snr_threshold, local_ratio)
+        table = pd.DataFrame(scores)
+        table["peak_index"] += start
+        table.insert(0, "start_s", starts * hop / rate)
+        table.insert(
+            1, "end_s", (starts * hop + (window_frames - 1) * hop + frame_size) / rate
+        )
+        tables.append(table)
+
+    windows = pd.concat(tables, ignore_index=True)
+    windows["end_s"] = windows["end_s"].clip(upper=len(audio) / rate)
+    return {
+        "method": method,
+        "detected": bool(windows["detected"].any()),
+        "windows": windows,
+        "segments": _merge_segments(windows),
+    }
+
+
+def _merge_segments(windows: pd.DataFrame) -> pd.DataFrame:
+    edges = np.diff(np.r_[0, windows["detected"].to_numpy(np.int8), 0])
+    first = np.flatnonzero(edges == 1)
+    last = np.flatnonzero(edges == -1) - 1
+    z_score = windows["z_score"].to_numpy()
+    peak_index = windows["peak_index"].to_numpy()
+    return pd.DataFrame(
+        {
+            "start_s": windows["start_s"].to_numpy()[first],
+            "end_s": windows["end_s"].to_numpy()[last],
+            "windows": last - first + 1,
+            "peak_index": [
+                int(np.median(peak_index[a : b + 1])) for a, b in zip(first, last)
+            ],
+            "max_z_score": [z_score[a : b + 1].max() for a, b in zip(first, last)],
+        }
+    )
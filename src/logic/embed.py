@@ -1,6 +1,11 @@
 import secrets
 
 import numpy as np
+from scipy.signal import oaconvolve
+
+from logic.profiling import record, stage
+
+SPARSE_TAPS = 8
 
 
 def generate_watermark(length: int) -> str:
@@ -15,39 +20,94 @@ def embed_echo(
     alpha: float,
     delta: int,
     watermark: str | None = None,
+    full_track: bool = True,
 ) -> np.ndarray:
     bipolar = watermark_to_bipolar(watermark) if watermark else None
-    return add_echo(audio, alpha, delta, bipolar)
+    with stage("echo") as entry:
+        marked = add_echo(audio, alpha, delta, bipolar, full_track)
+        record(entry, marked)
+    return marked
 
 
 def watermark_to_bipolar(watermark: str) -> np.ndarray:
     watermark_bytes = bytes.fromhex(watermark)
     bits = np.unpackbits(np.frombuffer(watermark_bytes, dtype=np.uint8))
-    p_bipolar = 2 * bits - 1
+    p_bipolar = 2 * bits.astype(np.int8) - 1
     return p_bipolar
 
 
+def echo_kernel(taps: list[tuple]) -> tuple[int, np.ndarray]:
+    taps = sorted(taps, key=lambda tap: (tap[1], tap[0]))
+    offset = min(tap[1] for tap in taps)
+    length = max(
+        tap[1] + (len(tap[2]) if len(tap) > 2 and tap[2] is not None else 1)
+        for tap in taps
+    )
+    kernel = np.zeros(length - offset, dtype=np.float64)
+    for alpha, delta, *pattern in taps:
+        if pattern and pattern[0] is not None:
+            values = alpha * np.asarray(pattern[0], dtype=np.float64)
+            kernel[delta - offset : delta - offset + len(values)] += values
+        else:
+            kernel[delta - offset] += alpha
+    return offset, kernel.astype(np.float32)
+
+
+def add_echoes(data: np.ndarray, taps: list[tuple]) -> np.ndarray:
+    taps = [tap for tap in taps if tap[0] != 0 and tap[1] > 0]
+    if not taps:
+        return data
+
+    y = np.array(data, dtype=np.float32)
+    if y.ndim == 1:
+        y = y[:, None]
+    n = len(y)
+    offset, kernel = echo_kernel(taps)
+    if offset >= n:
+        return y.squeeze()
+
+    span = n - offset
+    nonzero = np.flatnonzero(kernel[:span])
+    if len(nonzero) <= SPARSE_TAPS:
+        echo = np.zeros((span, y.shape[1]), dtype=np.float32)
+        for k in nonzero:
+            echo[k:] += kernel[k] * y[: span - k]
+    else:
+        echo = oaconvolve(y[:span], kernel[:span, None], axes=0)[:span]
+    y[offset:] += echo
+    peak = max(y.max(), -y.min())
+    if peak > 1.0:
+        y /= peak
+
+    return y.squeeze()
+
+
 def add_echo(
-    data: np.ndarray, alpha: float, delta: int, pattern: np.ndarray | None = None
+    data: np.ndarray,
+    alpha: float,
+    delta: int,
+    pattern: np.ndarray | None = None,
+    full_track: bool = True,
 ) -> np.ndarray:
     if delta <= 0 or alpha == 0:
         return data
 
-    x = np.copy(data).astype(np.float32)
-    if x.ndim == 1:
-        x = x[:, None]
-    n, C = x.shape
-    y = np.copy(x)
+    y = np.array(data, dtype=np.float32)
+    if y.ndim == 1:
+        y = y[:, None]
+    n, C = y.shape
     if delta >= n:
         return y.squeeze()
     if pattern is None:
-        y[delta:] += alpha * x[:-delta]
+        y[delta:] += alpha * y[:-delta]
     else:
-        pattern = np.asarray(pattern, dtype=np.float32)
-        for i in range(min(len(pattern), n - delta)):
-            y[delta + i, :] += alpha * pattern[i] * x[i, :]
-    max_val = np.max(np.abs(y))
-    if max_val > 1.0:
-        y = y / max_val
+        kernel = alpha * np.asarray(pattern, dtype=np.float32)
+        span = n - delta if full_track else min(len(kernel), n - delta)
+        echo = oaconvolve(y[:span], kernel[:, None], axes=0)
+        stop = min(len(echo), n - delta)
+        y[delta : delta + stop] += echo[:stop]
+    peak = max(y.max(), -y.min())
+    if peak > 1.0:
+        y /= peak
 
     return y.squeeze()
@@ -0,0 +1,195 @@
+import itertools
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from logic.batch import available_workers, iter_audio_files
+from logic.cache import content_hash
+from logic.corpus import corpus_files, is_corpus_track, read_track
+from logic.detect import cepstrum_length, compute_cepstrum, detect_from_cepstrum
+from logic.embed import add_echo, watermark_to_bipolar
+from logic.utils import read_audio
+
+RESULTS_DIR = Path("output/reports/experiments")
+EMBED_PARAMS = ["alpha", "delta", "pattern_length", "method"]
+DETECT_PARAMS = ["sigma_factor", "snr_threshold"]
+
+
+def parameter_grid(
+    alphas: list[float],
+    deltas: list[int],
+    pattern_lengths: list[int],
+    methods: list[str],
+    sigma_factors: list[float],
+    snr_thresholds: list[float],
+) -> list[dict]:
+    grid, seen = [], set()
+    for alpha, delta, length, method, sigma_factor, snr_threshold in itertools.product(
+        alphas, deltas, pattern_lengths, methods, sigma_factors, snr_thresholds
+    ):
+        point = {
+            "alpha": alpha,
+            "delta": delta,
+            "pattern_length": length if method == "time-spread" else 0,
+            "method": method,
+            "sigma_factor": sigma_factor,
+            "snr_threshold": snr_threshold,
+        }
+        if tuple(point.values()) not in seen:
+            seen.add(tuple(point.values()))
+            grid.append(point)
+    return grid
+
+
+def experiment_key(track: str, alpha: float, delta: int, pattern_length: int) -> str:
+    seed = int(content_hash(repr((track, alpha, delta, pattern_length)).encode()), 16)
+    rng = np.random.default_rng(seed)
+    return (
+        rng.integers(0, 256, size=pattern_length // 8, dtype=np.uint8).tobytes().hex()
+    )
+
+
+@lru_cache(maxsize=8)
+def load_track(track: str, max_seconds: float | None = None) -> tuple:
+    audio, rate = read_track(track) if is_corpus_track(track) else read_audio(track)
+    if audio.ndim > 1:
+        audio = audio[:, 0]
+    if max_seconds is not None:
+        audio = audio[: int(max_seconds * rate)]
+    audio.flags.writeable = False
+    return audio, rate
+
+
+@lru_cache(maxsize=8)
+def cover_cepstrum(
+    track: str, max_seconds: float | None = None, length: int | None = None
+) -> np.ndarray:
+    audio, _ = load_track(track, max_seconds)
+    return compute_cepstrum(audio, length=length)
+
+
+def run_embedding(
+    track: str,
+    embedding: dict,
+    thresholds: list[dict],
+    max_seconds: float | None = None,
+    lag_range: tuple = (10, 301),
+    search_range: tuple = (20, 500),
+) -> list[dict]:
+    audio, rate = load_track(track, max_seconds)
+    alpha, delta, length, method = (embedding[name] for name in EMBED_PARAMS)
+    watermark = experiment_key(track, alpha, delta, length) if length else None
+    pattern = watermark_to_bipolar(watermark) if watermark else None
+
+    size = cepstrum_length(method, length, search_range, lag_range)
+    cepstra = {
+        True: compute_cepstrum(add_echo(audio, alpha, delta, pattern), length=size),
+        False: cover_cepstrum(track, max_seconds, size),
+    }
+    rows = []
+    for embedded, cepstrum in cepstra.items():
+        for threshold in thresholds:
+            result = detect_from_cepstrum(
+                cepstrum,
+                rate,
+                method,
+                watermark,
+                search_range=search_range,
+                lag_range=lag_range,
+                **threshold,
+            )
+            rows.append(
+                {
+                    "track": track,
+                    **embedding,
+                    **threshold,
+                    "embedded": embedded,
+                    "detected": bool(result["detected"]),
+                    "peak_index": result.get("peak_index"),
+                    "peak_value": result.get("peak_value"),
+                    "threshold": result.get("threshold"),
+                    "snr_ratio": result.get("snr_ratio"),
+                    "local_max": result.get("local_max"),
+                    "delay_found": result.get("peak_index") == delta,
+                }
+            )
+    return rows
+
+
+def run_experiments(
+    tracks: list[str],
+    grid: list[dict],
+    workers: int | None = None,
+    max_seconds: float | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> pd.DataFrame:
+    embeddings, thresholds = _split_grid(grid)
+    jobs = list(itertools.product(tracks, embeddings))
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers or available_workers()) as pool:
+        futures = [
+            pool.submit(
+                run_embedding,
+                track,
+                embedding,
+                thresholds[_key(embedding)],
+                max_seconds,
+            )
+            for track, embedding in jobs
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            rows.extend(future.result())
+            if progress is not None:
+                progress(done, len(futures))
+    return pd.DataFrame(rows)
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    params = EMBED_PARAMS + DETECT_PARAMS
+    positives = results[results["embedded"]].groupby(params)
+    negatives = results[~results["embedded"]].groupby(params)
+    summary = pd.DataFrame(
+        {
+            "tracks": positives["track"].nunique(),
+            "true_positive_rate": positives["detected"].mean(),
+            "false_negative_rate": 1 - positives["detected"].mean(),
+            "false_positive_rate": negatives["detected"].mean(),
+            "delay_accuracy": positives["delay_found"].mean(),
+            "mean_snr_ratio": positives["snr_ratio"].mean(),
+        }
+    )
+    return summary.reset_index()
+
+
+def corpus_tracks(root: str | Path) -> list[str]:
+    files = [str(path) for path in iter_audio_files(root)]
+    return files + corpus_files(root)
+
+
+def save_results(results: pd.DataFrame, path: str | Path | None = None) -> Path:
+    path = Path(path or RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}.parquet")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    results.to_parquet(path, index=False)
+    return path
+
+
+def _key(embedding: dict) -> tuple:
+    return tuple(embedding[name] for name in EMBED_PARAMS)
+
+
+def _split_grid(grid: list[dict]) -> tuple[list[dict], dict]:
+    embeddings, thresholds = [], {}
+    for point in grid:
+        embedding = {name: point[name] for name in EMBED_PARAMS}
+        if _key(embedding) not in thresholds:
+            embeddings.append(embedding)
+            thresholds[_key(embedding)] = []
+        thresholds[_key(embedding)].append(
+            {name: point[name] for name in DETECT_PARAMS}
+        )
+    return embeddings, thresholds
@@ -0,0 +1,194 @@
+import os
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+from logic.cache import file_hash
+from logic.detect import compute_cepstrum, fuse_cepstra
+from logic.utils import read_audio
+
+FEATURES_DIR = Path("output/features")
+DATABASE_NAME = "features.sqlite"
+FEATURE_LENGTH = 2048
+CHUNK_ROWS = 4096
+
+
+class FeatureStore:
+    def __init__(
+        self,
+        root: str | Path = FEATURES_DIR,
+        length: int = FEATURE_LENGTH,
+        chunk_rows: int = CHUNK_ROWS,
+        frame_size: int | None = None,
+        hop: int | None = None,
+        window: str = "hann",
+        dtype: type = np.float32,
+    ) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(
+            self.root / DATABASE_NAME, timeout=60, isolation_level=None
+        )
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS settings (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS features (
+                digest TEXT PRIMARY KEY,
+                row INTEGER NOT NULL UNIQUE,
+                rate INTEGER NOT NULL,
+                quefrencies INTEGER NOT NULL,
+                channels INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            );
+            """)
+        settings = {
+            "length": str(length),
+            "frame_size": str(frame_size),
+            "hop": str(hop),
+            "window": window,
+            "dtype": np.dtype(dtype).name,
+        }
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO settings VALUES (?, ?)",
+            [*settings.items(), ("chunk_rows", str(chunk_rows))],
+        )
+        stored = {name: self.__setting(name) for name in settings}
+        if stored != settings:
+            raise ValueError(
+                f"Feature store at {self.root} was built with {stored}, "
+                f"not {settings}."
+            )
+        self.length = length
+        self.frame_size = frame_size
+        self.hop = hop
+        self.window = window
+        self.dtype = dtype
+        self.chunk_rows = int(self.__setting("chunk_rows"))
+        self.__shards = {}
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+
+    def __contains__(self, digest: str) -> bool:
+        return self.__lookup(digest) is not None
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "FeatureStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, digest: str) -> tuple[np.ndarray, int] | None:
+        found = self.__lookup(digest)
+        if found is None:
+            return None
+        row, rate, quefrencies = found
+        cepstrum = self.__shard(row // self.chunk_rows)[row % self.chunk_rows]
+        cepstrum = cepstrum[:quefrencies]
+        cepstrum.flags.writeable = False
+        return cepstrum, rate
+
+    def put(self, digest: str, cepstrum: np.ndarray, rate: int, channels: int) -> int:
+        cepstrum = cepstrum[: self.length]
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            found = self.__lookup(digest)
+            if found is not None:
+                self.connection.execute("ROLLBACK")
+                return found[0]
+            row = self.connection.execute(
+                "SELECT COALESCE(MAX(row) + 1, 0) FROM features"
+            ).fetchone()[0]
+            shard = self.__shard(row // self.chunk_rows, create=True)
+            shard[row % self.chunk_rows, : len(cepstrum)] = cepstrum
+            shard.flush()
+            self.connection.execute(
+                "INSERT INTO features VALUES (?, ?, ?, ?, ?)",
+                (digest, row, int(rate), len(cepstrum), channels),
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return row
+
+    def digest(self, path: str | Path) -> str:
+        path = Path(path).resolve()
+        stat = path.stat()
+        found = self.connection.execute(
+            "SELECT digest FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (str(path), stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        if found is not None:
+            return found[0]
+        digest = file_hash(path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+            (str(path), stat.st_size, stat.st_mtime_ns, digest),
+        )
+        return digest
+
+    def add_file(self, path: str | Path) -> tuple[str, bool]:
+        digest = self.digest(path)
+        if digest in self:
+            return digest, False
+        audio, rate = read_audio(path)
+        cepstrum = compute_cepstrum(
+            audio, self.frame_size, self.hop, self.window, self.length, self.dtype
+        )
+        channels = 1 if audio.ndim == 1 else audio.shape[1]
+        self.put(digest, fuse_cepstra(cepstrum), rate, channels)
+        return digest, True
+
+    def features(
+        self, path: str | Path, length: int | None = None
+    ) -> tuple[np.ndarray, int]:
+        if length is None or length > self.length:
+            raise ValueError(
+                f"Feature store keeps {self.length} quefrencies, {length} requested. "
+                "Pass a lag range that fits."
+            )
+        digest, _ = self.add_file(path)
+        return self.get(digest)
+
+    def __lookup(self, digest: str) -> tuple | None:
+        return self.connection.execute(
+            "SELECT row, rate, quefrencies FROM features WHERE digest = ?", (digest,)
+        ).fetchone()
+
+    def __shard(self, index: int, create: bool = False) -> np.memmap:
+        if index in self.__shards:
+            return self.__shards[index]
+        path = self.root / f"shard_{index:05d}.npy"
+        if not path.exists():
+            if not create:
+                raise ValueError(f"Feature shard {path} is missing.")
+            staging = path.with_name(path.name + ".part")
+            np.lib.format.open_memmap(
+                staging, "w+", np.float32, (self.chunk_rows, self.length)
+            ).flush()
+            os.replace(staging, path)
+        self.__shards[index] = np.load(path, mmap_mode="r+")
+        return self.__shards[index]
+
+    def __setting(self, name: str) -> str:
+        return self.connection.execute(
+            "SELECT value FROM settings WHERE name = ?", (name,)
+        ).fetchone()[0]
+
+
+def index_file(source: str, features: str | Path = FEATURES_DIR) -> dict:
+    with FeatureStore(features) as store:
+        digest, added = store.add_file(source)
+    return {"file": source, "digest": digest, "added": added}
@@ -0,0 +1,137 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import get_window, oaconvolve
+
+from logic.embed import watermark_to_bipolar
+from logic.profiling import record, stage
+from logic.utils import truncated_cepstra
+
+PAYLOAD_DELAYS = (60, 90)
+PAYLOAD_REPEATS = 3
+PAYLOAD_FRAME = 2048
+PAYLOAD_BATCH = 2048
+MIN_SEGMENT_FRAMES = 4
+RAMP = 256
+CRC_BITS = 8
+
+
+def crc8(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07 if crc & 0x80 else crc << 1) & 0xFF
+    return crc
+
+
+def encode_payload(payload: str, repeats: int = PAYLOAD_REPEATS) -> np.ndarray:
+    data = bytes.fromhex(payload)
+    if not data:
+        raise ValueError("Payload must contain at least one byte.")
+    if repeats < 1:
+        raise ValueError("repeats must be at least 1.")
+    bits = watermark_to_bipolar((data + bytes([crc8(data)])).hex()) > 0
+    return np.tile(bits, repeats)
+
+
+def segment_length(samples: int, coded_bits: int, frame_size: int) -> int:
+    segment = samples // coded_bits
+    if segment < MIN_SEGMENT_FRAMES * frame_size:
+        raise ValueError(
+            f"Audio is too short: {coded_bits} coded bits need at least "
+            f"{MIN_SEGMENT_FRAMES * frame_size * coded_bits} samples."
+        )
+    return segment
+
+
+def embed_payload(
+    audio: np.ndarray,
+    payload: str,
+    alpha: float = 0.05,
+    delays: tuple = PAYLOAD_DELAYS,
+    repeats: int = PAYLOAD_REPEATS,
+    frame_size: int = PAYLOAD_FRAME,
+    ramp: int = RAMP,
+) -> np.ndarray:
+    coded = encode_payload(payload, repeats)
+    y = np.array(audio, dtype=np.float32)
+    if y.ndim == 1:
+        y = y[:, None]
+    n = len(y)
+    segment = segment_length(n, len(coded), frame_size)
+
+    with stage("echo") as entry:
+        mask = np.repeat(coded.astype(np.float32), segment)
+        mask = np.pad(mask, (0, n - len(mask)), mode="edge")
+        fade = get_window("hann", ramp).astype(np.float32)
+        mask = oaconvolve(mask, fade / fade.sum(), mode="same")[:, None]
+        low, high = delays
+        echo = np.zeros_like(y)
+        echo[low:] += (1 - mask[low:]) * y[:-low]
+        echo[high:] += mask[high:] * y[:-high]
+        y += alpha * echo
+        peak = max(y.max(), -y.min())
+        if peak > 1.0:
+            y /= peak
+        record(entry, y, segment=segment, coded_bits=len(coded))
+
+    return y.squeeze()
+
+
+def decode_payload(
+    audio: np.ndarray,
+    bits: int,
+    delays: tuple = PAYLOAD_DELAYS,
+    repeats: int = PAYLOAD_REPEATS,
+    frame_size: int = PAYLOAD_FRAME,
+    batch: int = PAYLOAD_BATCH,
+) -> dict:
+    if bits <= 0 or bits % 8 != 0:
+        raise ValueError("bits must be a positive multiple of 8.")
+    if audio.ndim == 2:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    if audio.ndim != 1:
+        raise ValueError("Audio must be a 1D or (samples, channels) numpy array.")
+    coded_bits = (bits + CRC_BITS) * repeats
+    segment = segment_length(len(audio), coded_bits, frame_size)
+
+    hop = frame_size // 2
+    frames = sliding_window_view(audio, frame_size)[::hop]
+    starts = np.arange(len(frames)) * hop
+    index = starts // segment
+    inside = (index == (starts + frame_size - 1) // segment) & (index < coded_bits)
+    rows = np.flatnonzero(inside)
+    taper = get_window("hann", frame_size, fftbins=True).astype(np.float32)
+    low, high = delays
+
+    with stage("cepstrum") as entry:
+        scores = np.empty(len(rows), dtype=np.float64)
+        for i in range(0, len(rows), batch):
+            chunk = rows[i : i + batch]
+            ceps = truncated_cepstra(frames[chunk], taper, high + 1)
+            scores[i : i + batch] = ceps[:, high] - ceps[:, low]
+        record(entry, scores, frames=len(rows))
+
+    with stage("decode") as entry:
+        counts = np.bincount(index[rows], minlength=coded_bits)
+        totals = np.bincount(index[rows], weights=scores, minlength=coded_bits)
+        segment_scores = totals / np.maximum(counts, 1)
+        votes = segment_scores.reshape(repeats, -1)
+        soft = votes.sum(axis=0)
+        decoded = soft > 0
+        disagreements = int(np.sum((votes > 0) != decoded))
+        record(entry, votes, disagreements=disagreements)
+
+    data = np.packbits(decoded).tobytes()
+    payload, checksum = data[:-1], data[-1]
+    confidence = np.abs(soft) / (np.abs(votes).sum(axis=0) + 1e-12)
+    return {
+        "payload": payload.hex(),
+        "valid": crc8(payload) == checksum,
+        "bits": decoded[:bits],
+        "confidence": confidence[:bits],
+        "min_confidence": float(confidence.min()),
+        "disagreements": disagreements,
+        "segment_samples": segment,
+        "segment_scores": segment_scores,
+    }
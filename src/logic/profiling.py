@@ -0,0 +1,102 @@
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+import numpy as np
+import pandas as pd
+
+_ACTIVE: ContextVar["Profiler | None"] = ContextVar("profiler", default=None)
+_DISABLED = nullcontext()
+_LOCK = threading.Lock()
+_OPEN_STAGES = []
+_TRACING = {"users": 0, "owned": False}
+
+
+class Profiler:
+    def __init__(self, track_memory: bool = True) -> None:
+        self.track_memory = track_memory
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[dict]:
+        entry = {"stage": name, "seconds": 0.0, "allocated_bytes": None}
+        if self.track_memory:
+            with _LOCK:
+                before = _fold_peak()
+                memory = {"peak": before}
+                _OPEN_STAGES.append(memory)
+        started = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = time.perf_counter() - started
+            if self.track_memory:
+                with _LOCK:
+                    _fold_peak()
+                    _OPEN_STAGES.remove(memory)
+                entry["allocated_bytes"] = memory["peak"] - before
+            self.stages.append(entry)
+
+    def table(self) -> pd.DataFrame:
+        return pd.DataFrame(self.stages)
+
+    def total_seconds(self) -> float:
+        return sum(entry["seconds"] for entry in self.stages)
+
+
+@contextmanager
+def profiled(track_memory: bool = True) -> Iterator[Profiler]:
+    profiler = Profiler(track_memory)
+    if track_memory:
+        _start_tracing()
+    parent = _ACTIVE.get()
+    token = _ACTIVE.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _ACTIVE.reset(token)
+        if parent is not None:
+            parent.stages.extend(profiler.stages)
+        if track_memory:
+            _stop_tracing()
+
+
+def stage(name: str):
+    profiler = _ACTIVE.get()
+    return _DISABLED if profiler is None else profiler.stage(name)
+
+
+def record(entry: dict | None, array: np.ndarray, **stats) -> None:
+    if entry is None:
+        return
+    entry["shape"] = array.shape
+    entry["dtype"] = str(array.dtype)
+    entry["array_bytes"] = array.nbytes
+    entry.update(stats)
+
+
+def _fold_peak() -> int:
+    current, peak = tracemalloc.get_traced_memory()
+    for memory in _OPEN_STAGES:
+        memory["peak"] = max(memory["peak"], peak)
+    tracemalloc.reset_peak()
+    return current
+
+
+def _start_tracing() -> None:
+    with _LOCK:
+        if _TRACING["users"] == 0:
+            _TRACING["owned"] = not tracemalloc.is_tracing()
+            if _TRACING["owned"]:
+                tracemalloc.start()
+        _TRACING["users"] += 1
+
+
+def _stop_tracing() -> None:
+    with _LOCK:
+        _TRACING["users"] -= 1
+        if _TRACING["users"] == 0 and _TRACING["owned"]:
+            tracemalloc.stop()
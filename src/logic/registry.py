@@ -0,0 +1,154 @@
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from logic.embed import generate_watermark
+
+DATABASE_NAME = "registry.sqlite"
+PATTERNS_NAME = "patterns.bin"
+
+
+class WatermarkRegistry:
+    def __init__(self, root: str | Path, bits: int | None = None) -> None:
+        if bits is not None and bits % 8 != 0:
+            raise ValueError("bits must be a multiple of 8.")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.patterns_path = self.root / PATTERNS_NAME
+        self.connection = sqlite3.connect(self.root / DATABASE_NAME)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS settings (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS keys (
+                row INTEGER PRIMARY KEY,
+                watermark TEXT NOT NULL UNIQUE,
+                asset TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS keys_asset ON keys (asset);
+            """)
+        self.connection.execute(
+            "INSERT OR IGNORE INTO settings VALUES ('bits', ?)", (str(bits or 1024),)
+        )
+        self.connection.commit()
+        self.bits = int(self.__setting("bits"))
+        if bits is not None and self.bits != bits:
+            raise ValueError(f"Registry at {self.root} stores {self.bits}-bit keys.")
+        self.patterns_path.touch()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+
+    def __contains__(self, watermark: str) -> bool:
+        return self.lookup(watermark) is not None
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "WatermarkRegistry":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def issue(self, asset: str, metadata: dict | None = None) -> str:
+        watermark = generate_watermark(self.bits)
+        self.add(watermark, asset, metadata)
+        return watermark
+
+    def add(self, watermark: str, asset: str, metadata: dict | None = None) -> int:
+        return self.add_many([watermark], [asset], [metadata])[0]
+
+    def add_many(
+        self,
+        watermarks: list[str],
+        assets: list[str],
+        metadata: list[dict | None] | None = None,
+    ) -> list[int]:
+        if len(watermarks) != len(assets):
+            raise ValueError("watermarks and assets must have the same length.")
+        metadata = metadata or [None] * len(watermarks)
+        packed = np.stack([self.__pack(wm) for wm in watermarks])
+        created_at = datetime.now(timezone.utc).isoformat()
+
+        start = len(self)
+        rows = list(range(start, start + len(watermarks)))
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO keys VALUES (?, ?, ?, ?, ?)",
+                [
+                    (row, wm.lower(), asset, json.dumps(meta or {}), created_at)
+                    for row, wm, asset, meta in zip(rows, watermarks, assets, metadata)
+                ],
+            )
+            with open(self.patterns_path, "r+b") as f:
+                f.seek(start * packed.shape[1])
+                f.write(packed.tobytes())
+                f.truncate()
+        return rows
+
+    def lookup(self, watermark: str) -> dict | None:
+        row = self.connection.execute(
+            "SELECT * FROM keys WHERE watermark = ?", (watermark.lower(),)
+        ).fetchone()
+        return self.__to_record(row) if row else None
+
+    def assets(self, asset: str) -> list[dict]:
+        rows = self.connection.execute(
+            "SELECT * FROM keys WHERE asset = ? ORDER BY row", (asset,)
+        )
+        return [self.__to_record(row) for row in rows]
+
+    def records(self, rows: np.ndarray | list[int]) -> list[dict]:
+        rows = [int(row) for row in rows]
+        found = {}
+        for start in range(0, len(rows), 500):
+            chunk = rows[start : start + 500]
+            query = "SELECT * FROM keys WHERE row IN (%s)" % ",".join("?" * len(chunk))
+            for record in self.connection.execute(query, chunk):
+                found[record[0]] = self.__to_record(record)
+        return [found[row] for row in rows]
+
+    def watermarks(self) -> list[str]:
+        rows = self.connection.execute("SELECT watermark FROM keys ORDER BY row")
+        return [row[0] for row in rows]
+
+    def packed(self) -> np.ndarray:
+        count = len(self)
+        if count == 0:
+            return np.empty((0, self.bits // 8), dtype=np.uint8)
+        return np.memmap(
+            self.patterns_path, dtype=np.uint8, mode="r", shape=(count, self.bits // 8)
+        )
+
+    def patterns(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        bits = np.unpackbits(self.packed()[start:stop], axis=1)
+        return 2 * bits.astype(np.int8) - 1
+
+    def __pack(self, watermark: str) -> np.ndarray:
+        packed = np.frombuffer(bytes.fromhex(watermark), dtype=np.uint8)
+        if len(packed) * 8 != self.bits:
+            raise ValueError(f"Watermark must have {self.bits} bits.")
+        return packed
+
+    def __setting(self, name: str) -> str:
+        return self.connection.execute(
+            "SELECT value FROM settings WHERE name = ?", (name,)
+        ).fetchone()[0]
+
+    @staticmethod
+    def __to_record(row: tuple) -> dict:
+        index, watermark, asset, metadata, created_at = row
+        return {
+            "row": index,
+            "watermark": watermark,
+            "asset": asset,
+            "metadata": json.loads(metadata),
+            "created_at": created_at,
+        }
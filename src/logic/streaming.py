@@ -0,0 +1,170 @@
+import logging
+import queue
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import get_window, oaconvolve
+
+from logic.detect import (
+    SEGMENT_HOP_SECONDS,
+    SEGMENT_SECONDS,
+    score_correlations,
+    segment_frames,
+    segment_pattern,
+)
+from logic.utils import FRAME_SIZE, truncated_cepstra
+
+STREAM_BLOCK = 4096
+STREAM_QUEUE = 64
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingDetector:
+    def __init__(
+        self,
+        rate: int,
+        method: str = "time-spread",
+        expected_watermark_hex: str | None = None,
+        window_seconds: float = SEGMENT_SECONDS,
+        hop_seconds: float = SEGMENT_HOP_SECONDS,
+        lag_range: tuple = (10, 301),
+        sigma_factor: float = 4.0,
+        snr_threshold: float = 5.0,
+        local_ratio: float = 2.0,
+        frame_size: int = FRAME_SIZE,
+        window: str = "hann",
+        profile: dict | None = None,
+    ) -> None:
+        if profile is not None:
+            sigma_factor = profile.get("sigma_factor", sigma_factor)
+            snr_threshold = profile.get("snr_threshold", snr_threshold)
+            local_ratio = profile.get("local_ratio", local_ratio)
+            lag_range = profile.get("lag_range", lag_range)
+        self.rate = rate
+        self.thresholds = (sigma_factor, snr_threshold, local_ratio)
+        self.pattern = segment_pattern(method, expected_watermark_hex)[None, ::-1]
+        self.frame_size = frame_size
+        self.hop = frame_size // 2
+        self.start, stop = lag_range
+        self.length = stop + self.pattern.shape[1] - 1
+        if self.length > self.hop:
+            raise ValueError("lag_range and pattern must fit in half a frame.")
+        self.window_frames, self.step_frames = segment_frames(
+            rate, window_seconds, hop_seconds, frame_size
+        )
+        self.taper = get_window(window, frame_size, fftbins=True).astype(np.float32)
+        self.__samples = np.zeros(frame_size, dtype=np.float32)
+        self.__filled = 0
+        self.__cepstra = np.zeros((self.window_frames, self.length))
+        self.__frames = 0
+        self.__active = None
+
+    @property
+    def window_seconds(self) -> float:
+        return ((self.window_frames - 1) * self.hop + self.frame_size) / self.rate
+
+    @property
+    def latency_seconds(self) -> float:
+        return self.step_frames * self.hop / self.rate
+
+    def process(self, block: np.ndarray) -> list[dict]:
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim == 2:
+            block = block.mean(axis=1)
+        rows = []
+        while len(block):
+            take = min(len(block), self.frame_size - self.__filled)
+            self.__samples[self.__filled : self.__filled + take] = block[:take]
+            self.__filled += take
+            block = block[take:]
+            if self.__filled == self.frame_size:
+                row = self.__push_frame()
+                if row is not None:
+                    rows.append(row)
+                self.__samples[: self.hop] = self.__samples[self.hop :]
+                self.__filled = self.frame_size - self.hop
+        return rows
+
+    def events(self, blocks: Iterable[np.ndarray]) -> Iterator[dict]:
+        for block in blocks:
+            for row in self.process(block):
+                if row["detected"] and self.__active is None:
+                    self.__active = row
+                    yield {"event": "start", **row}
+                elif not row["detected"] and self.__active is not None:
+                    self.__active = None
+                    yield {"event": "end", **row}
+
+    def __push_frame(self) -> dict | None:
+        ceps = truncated_cepstra(
+            self.__samples[None], self.taper, self.length, workers=1
+        )
+        self.__cepstra[self.__frames % self.window_frames] = ceps[0]
+        self.__frames += 1
+        first = self.__frames - self.window_frames
+        if first < 0 or first % self.step_frames:
+            return None
+
+        average = self.__cepstra.mean(axis=0)
+        corr = oaconvolve(average[None, self.start :], self.pattern, "valid", axes=1)
+        scores = score_correlations(corr, *self.thresholds)
+        row = {key: value[0].item() for key, value in scores.items()}
+        row["peak_index"] += self.start
+        start_s = first * self.hop / self.rate
+        return {"start_s": start_s, "end_s": start_s + self.window_seconds, **row}
+
+
+class InputQueue:
+    def __init__(self, maxsize: int = STREAM_QUEUE) -> None:
+        self.blocks = queue.Queue(maxsize)
+        self.dropped = 0
+        self.overflows = 0
+        self.__reported = (0, 0)
+
+    def callback(self, indata, frames, time, status) -> None:
+        if status.input_overflow:
+            self.overflows += 1
+        try:
+            self.blocks.put_nowait(indata.copy())
+        except queue.Full:
+            self.dropped += 1
+
+    def get(self) -> np.ndarray:
+        block = self.blocks.get()
+        counts = (self.dropped, self.overflows)
+        if counts != self.__reported:
+            self.__reported = counts
+            logger.warning(
+                "Input is falling behind: %d blocks dropped, %d overflows.", *counts
+            )
+        return block
+
+
+def iter_file_blocks(
+    path: str | Path, block_size: int = STREAM_BLOCK
+) -> Iterator[np.ndarray]:
+    yield from sf.blocks(path, block_size, dtype="float32")
+
+
+def iter_input_blocks(
+    rate: int,
+    block_size: int = STREAM_BLOCK,
+    channels: int = 1,
+    device: int | str | None = None,
+) -> Iterator[np.ndarray]:
+    import sounddevice as sd
+
+    blocks = InputQueue()
+    with sd.InputStream(
+        samplerate=rate,
+        blocksize=block_size,
+        channels=channels,
+        dtype="float32",
+        device=device,
+        callback=blocks.callback,
+    ):
+        while True:
+            yield blocks.get()
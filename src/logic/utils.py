@@ -1,32 +1,147 @@
+from collections.abc import Iterator
 from io import BytesIO
+from pathlib import Path
 
 import numpy as np
-from numpy import log, abs
-from numpy.fft import ifft, fft
-from pydub import AudioSegment
+from numpy import log
+from numpy.fft import irfft, rfft
+from numpy.lib.stride_tricks import sliding_window_view
+import soundfile as sf
+from scipy import fft as sp_fft
+from scipy.signal import get_window, resample_poly
+
+from logic.profiling import record, stage
 
 LOG_FLOOR = 0.00001
+FRAME_SIZE = 8192
+FRAME_BATCH = 64
+FFT_WORKERS = 1
+MP3_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+MP3_MAX_BITRATE = 320
+PREVIEW_RATE = 24000
+
+
+def cepstrum(
+    data: np.ndarray,
+    length: int | None = None,
+    dtype: type = np.float64,
+    workers: int = FFT_WORKERS,
+) -> np.ndarray:
+    size = sp_fft.next_fast_len(len(data), real=True)
+    spectrum = sp_fft.rfft(
+        np.asarray(data, dtype=dtype), n=size, axis=0, workers=workers
+    )
+    power, imag = spectrum.real, spectrum.imag
+    np.square(power, out=power)
+    np.square(imag, out=imag)
+    power += imag
+    power += LOG_FLOOR
+    log(power, out=power)
+    imag[...] = 0
+    ceps = sp_fft.irfft(spectrum, n=size, axis=0, workers=workers, overwrite_x=True)
+    if length is None:
+        return ceps[: len(data)]
+    return ceps[:length].copy()
+
+
+def iter_cepstrum_frames(
+    data: np.ndarray,
+    frame_size: int = FRAME_SIZE,
+    hop: int | None = None,
+    window: str = "hann",
+    batch: int = FRAME_BATCH,
+) -> Iterator[np.ndarray]:
+    if data.ndim != 1:
+        raise ValueError("Audio must be mono (1D numpy array).")
+    if frame_size <= 0 or frame_size & (frame_size - 1):
+        raise ValueError("frame_size must be a power of two.")
+    hop = hop or frame_size // 2
+    if hop <= 0:
+        raise ValueError("hop must be positive.")
 
+    if len(data) < frame_size:
+        data = np.pad(data, (0, frame_size - len(data)))
+    frames = sliding_window_view(data, frame_size)[::hop]
+    taper = get_window(window, frame_size, fftbins=True).astype(np.float32)
 
-def cepstrum(data: np.ndarray) -> np.ndarray:
-    return ifft(log(abs(fft(data)) ** 2 + LOG_FLOOR)).real
+    for start in range(0, len(frames), batch):
+        block = frames[start : start + batch] * taper
+        spectrum = rfft(block, axis=-1)
+        power = spectrum.real**2 + spectrum.imag**2
+        yield from irfft(log(power + LOG_FLOOR), n=frame_size, axis=-1)
+
+
+def truncated_cepstra(
+    frames: np.ndarray, taper: np.ndarray, length: int, workers: int = FFT_WORKERS
+) -> np.ndarray:
+    frame_size = frames.shape[-1]
+    spectrum = sp_fft.rfft(frames * taper, axis=-1, workers=workers)
+    power = spectrum.real**2 + spectrum.imag**2
+    ceps = sp_fft.irfft(log(power + LOG_FLOOR), n=frame_size, axis=-1, workers=workers)
+    return ceps[:, :length]
+
+
+def averaged_cepstrum(
+    data: np.ndarray,
+    frame_size: int = FRAME_SIZE,
+    hop: int | None = None,
+    window: str = "hann",
+) -> np.ndarray:
+    total = np.zeros(frame_size, dtype=np.float64)
+    count = 0
+    for frame in iter_cepstrum_frames(data, frame_size, hop, window):
+        total += frame
+        count += 1
+    return total / count
 
 
 def normalize_audio(audio: np.ndarray) -> np.ndarray:
-    audio = audio.astype(np.float32)
-    max_val = np.max(np.abs(audio)) + 1e-12
-    return audio / max_val
-
-
-def audio_to_mp3_buffer(audio: np.ndarray, sr: int) -> BytesIO:
-    audio_int16 = np.int16(audio * 32767)
-    segment = AudioSegment(
-        audio_int16.tobytes(),
-        frame_rate=sr,
-        sample_width=audio_int16.dtype.itemsize,
-        channels=1,
+    with stage("normalize") as entry:
+        audio = audio.astype(np.float32)
+        max_val = np.max(np.abs(audio)) + 1e-12
+        audio = audio / max_val
+        record(entry, audio)
+    return audio
+
+
+def read_audio(path: str | Path) -> tuple:
+    with stage("decode") as entry:
+        audio, rate = sf.read(path, dtype="float32", always_2d=False)
+        record(entry, audio, rate=rate)
+    return normalize_audio(audio), rate
+
+
+def to_int16(audio: np.ndarray) -> np.ndarray:
+    return np.round(np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def audio_to_mp3_buffer(audio: np.ndarray, sr: int, bitrate: int = 128) -> BytesIO:
+    rate = min((r for r in MP3_RATES if r >= sr), default=MP3_RATES[-1])
+    if rate != sr:
+        audio = resample_poly(audio, rate, sr)
+    level = min(max((MP3_MAX_BITRATE - bitrate) / (MP3_MAX_BITRATE - 32), 0.0), 0.99)
+    return _encode(
+        to_int16(audio),
+        rate,
+        format="MP3",
+        subtype="MPEG_LAYER_III",
+        compression_level=level,
+        bitrate_mode="CONSTANT",
     )
+
+
+def audio_to_opus_buffer(
+    audio: np.ndarray, sr: int, rate: int = PREVIEW_RATE, quality: float = 0.8
+) -> BytesIO:
+    if rate != sr:
+        audio = resample_poly(audio, rate, sr)
+    return _encode(
+        to_int16(audio), rate, format="OGG", subtype="OPUS", compression_level=quality
+    )
+
+
+def _encode(audio: np.ndarray, rate: int, **write_kwargs) -> BytesIO:
     buffer = BytesIO()
-    segment.export(buffer, format="mp3")
+    sf.write(buffer, audio, rate, **write_kwargs)
     buffer.seek(0)
     return buffer
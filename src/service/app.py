@@ -0,0 +1,224 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from uuid import uuid4
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+
+from logic.audio_io import embed_echo_file
+from logic.batch import available_workers
+from logic.embed import generate_watermark
+from logic.registry import WatermarkRegistry
+from service.batching import DetectionBatcher
+from service.metrics import Metrics
+from service.workers import prepare_upload
+
+MAX_PENDING = 256
+CORRELATION_THREADS = 2
+MAX_UPLOAD_BYTES = 2 * 1024**3
+
+
+def create_app(
+    registry: str | None = None,
+    workers: int | None = None,
+    max_pending: int = MAX_PENDING,
+    max_batch: int = 32,
+    max_wait: float = 0.01,
+    max_upload_bytes: int = MAX_UPLOAD_BYTES,
+    spool_dir: str | None = None,
+) -> FastAPI:
+    metrics = Metrics()
+    slots = asyncio.Semaphore(max_pending)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        workers_count = workers or available_workers()
+        app.state.bits = None
+        if registry is not None:
+            with WatermarkRegistry(registry) as keys:
+                app.state.bits = keys.bits
+        with (
+            ProcessPoolExecutor(max_workers=workers_count) as pool,
+            ThreadPoolExecutor(max_workers=CORRELATION_THREADS) as correlator,
+            ThreadPoolExecutor(max_workers=1) as recorder,
+            TemporaryDirectory(dir=spool_dir, prefix="echomark-") as spool,
+        ):
+            app.state.pool = pool
+            app.state.recorder = recorder
+            app.state.spool = Path(spool)
+            app.state.batcher = DetectionBatcher(
+                correlator, registry, max_batch, max_wait, metrics
+            )
+            yield
+
+    app = FastAPI(title="EchoMark", lifespan=lifespan)
+
+    async def admit() -> None:
+        if slots.locked():
+            metrics.increment("rejected")
+            raise HTTPException(
+                503, "Too many pending requests.", headers={"Retry-After": "1"}
+            )
+        await slots.acquire()
+        metrics.increment("in_flight")
+
+    def release() -> None:
+        metrics.increment("in_flight", -1)
+        slots.release()
+
+    async def receive(request: Request) -> Path:
+        path = app.state.spool / f"{uuid4().hex}.upload"
+        size = 0
+        with metrics.measure("upload"), open(path, "wb") as f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > max_upload_bytes:
+                    f.close()
+                    path.unlink()
+                    raise HTTPException(413, "Upload is too large.")
+                f.write(chunk)
+        if size == 0:
+            path.unlink()
+            raise HTTPException(400, "Request body must contain an audio file.")
+        return path
+
+    @app.post("/detect")
+    async def detect(
+        request: Request,
+        watermark: list[str] | None = Query(None),
+        min_delta: int = 10,
+        max_delta: int = 300,
+        top: int = 5,
+    ) -> dict:
+        if not 0 <= min_delta < max_delta:
+            raise HTTPException(422, "Expected 0 <= min_delta < max_delta.")
+        if top < 1:
+            raise HTTPException(422, "top must be at least 1.")
+        watermarks = tuple(w.strip().lower() for w in watermark or [])
+        invalid = [w for w in watermarks if not _is_hex(w)]
+        if invalid:
+            raise HTTPException(422, f"Watermark {invalid[0]!r} is not a HEX key.")
+        if watermarks:
+            if len({len(w) for w in watermarks}) != 1:
+                raise HTTPException(422, "All watermarks must have the same length.")
+            pattern_length = len(watermarks[0]) * 4
+        elif registry is not None:
+            pattern_length = app.state.bits
+        else:
+            raise HTTPException(422, "Pass at least one watermark.")
+
+        await admit()
+        try:
+            with metrics.measure("detect"):
+                path = await receive(request)
+                loop = asyncio.get_running_loop()
+                try:
+                    with metrics.measure("cepstrum"):
+                        segment, offset, rate = await loop.run_in_executor(
+                            app.state.pool,
+                            prepare_upload,
+                            str(path),
+                            pattern_length,
+                            (min_delta, max_delta + 1),
+                        )
+                except Exception as e:
+                    raise HTTPException(422, f"Could not analyze audio: {e}")
+                finally:
+                    path.unlink(missing_ok=True)
+                matches = await app.state.batcher.submit(
+                    segment, offset, watermarks or None, top
+                )
+        finally:
+            release()
+
+        metrics.increment("detections")
+        for match in matches:
+            match["peak_time_s"] = match["peak_index"] / rate
+        return {
+            "detected": any(match["detected"] for match in matches),
+            "matches": matches,
+        }
+
+    @app.post("/embed")
+    async def embed(
+        request: Request,
+        alpha: float = 0.01,
+        delta: int = 75,
+        method: str = "time-spread",
+        watermark: str | None = None,
+        bits: int = 1024,
+        asset: str | None = None,
+    ) -> FileResponse:
+        if method not in ("simple", "time-spread"):
+            raise HTTPException(422, "method must be 'simple' or 'time-spread'.")
+        if method == "simple":
+            watermark = None
+        elif watermark is None:
+            bits = app.state.bits or bits
+            watermark = generate_watermark(bits)
+
+        await admit()
+        try:
+            with metrics.measure("embed"):
+                path = await receive(request)
+                target = path.with_suffix(".wav")
+                loop = asyncio.get_running_loop()
+                try:
+                    await loop.run_in_executor(
+                        app.state.pool,
+                        embed_echo_file,
+                        str(path),
+                        str(target),
+                        alpha,
+                        delta,
+                        watermark,
+                    )
+                except Exception as e:
+                    target.unlink(missing_ok=True)
+                    raise HTTPException(422, f"Could not embed watermark: {e}")
+                finally:
+                    path.unlink(missing_ok=True)
+        finally:
+            release()
+
+        if registry is not None and watermark is not None:
+            try:
+                await loop.run_in_executor(
+                    app.state.recorder,
+                    _register,
+                    registry,
+                    watermark,
+                    asset or target.name,
+                )
+            except ValueError as e:
+                target.unlink(missing_ok=True)
+                raise HTTPException(422, str(e))
+        metrics.increment("embeddings")
+        return FileResponse(
+            target,
+            media_type="audio/wav",
+            headers={"X-Watermark": watermark or ""},
+            background=BackgroundTask(target.unlink, missing_ok=True),
+        )
+
+    @app.get("/metrics")
+    async def metrics_endpoint() -> dict:
+        return metrics.snapshot()
+
+    return app
+
+
+def _register(registry: str, watermark: str, asset: str) -> None:
+    with WatermarkRegistry(registry) as keys:
+        keys.add(watermark, asset)
+
+
+def _is_hex(value: str) -> bool:
+    try:
+        return len(bytes.fromhex(value)) > 0
+    except ValueError:
+        return False
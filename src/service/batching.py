@@ -0,0 +1,87 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+
+import numpy as np
+
+from service.metrics import Metrics
+from service.workers import rank_batch
+
+
+class DetectionBatcher:
+    def __init__(
+        self,
+        pool: Executor,
+        registry: str | None = None,
+        max_batch: int = 32,
+        max_wait: float = 0.01,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.pool = pool
+        self.registry = registry
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.metrics = metrics or Metrics()
+        self.__pending = {}
+        self.__timers = {}
+        self.__tasks = set()
+
+    async def submit(
+        self,
+        segment: np.ndarray,
+        offset: int,
+        watermarks: tuple | None = None,
+        top: int = 5,
+    ) -> list[dict]:
+        if not watermarks and self.registry is None:
+            raise ValueError("Detection needs watermarks or a registry.")
+        loop = asyncio.get_running_loop()
+        key = (watermarks, offset, len(segment), top)
+        future = loop.create_future()
+        batch = self.__pending.setdefault(key, [])
+        batch.append((segment, future, time.perf_counter()))
+        if len(batch) >= self.max_batch:
+            self.__flush(key)
+        elif len(batch) == 1:
+            self.__timers[key] = loop.call_later(self.max_wait, self.__flush, key)
+        return await future
+
+    def __flush(self, key: tuple) -> None:
+        timer = self.__timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self.__pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self.__run(key, batch))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def __run(self, key: tuple, batch: list) -> None:
+        watermarks, offset, _, top = key
+        started = time.perf_counter()
+        for _, _, queued in batch:
+            self.metrics.observe("queue_wait_s", started - queued)
+        self.metrics.observe("batch_size", len(batch))
+        self.metrics.increment("batches")
+
+        segments = np.stack([segment for segment, _, _ in batch])
+        loop = asyncio.get_running_loop()
+        try:
+            with self.metrics.measure("correlate"):
+                results = await loop.run_in_executor(
+                    self.pool,
+                    rank_batch,
+                    segments,
+                    offset,
+                    watermarks,
+                    self.registry,
+                    top,
+                )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), rows in zip(batch, results):
+            if not future.done():
+                future.set_result(rows)
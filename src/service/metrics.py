@@ -0,0 +1,39 @@
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.counters = defaultdict(int)
+        self.__observations = defaultdict(lambda: [0, 0.0, 0.0])
+        self.__lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self.__lock:
+            self.counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        with self.__lock:
+            stats = self.__observations[name]
+            stats[0] += 1
+            stats[1] += value
+            stats[2] = max(stats[2], value)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{stage}_s", time.perf_counter() - started)
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            observations = {
+                name: {"count": count, "mean": total / count, "max": peak}
+                for name, (count, total, peak) in self.__observations.items()
+            }
+            return {"counters": dict(self.counters), "observations": observations}
@@ -0,0 +1,68 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from logic.utils import read_audio
+from logic.detect import (
+    cepstrum_length,
+    compute_cepstrum,
+    fuse_cepstra,
+    lag_segment,
+    rank_segments,
+)
+from logic.embed import watermark_to_bipolar
+from logic.registry import WatermarkRegistry
+
+KEY_BATCH = 4096
+
+
+def prepare_upload(
+    path: str, pattern_length: int, lag_range: tuple
+) -> tuple[np.ndarray, int, int]:
+    audio, rate = read_audio(path)
+    length = cepstrum_length("time-spread", pattern_length, lag_range=lag_range)
+    cepstrum = fuse_cepstra(compute_cepstrum(audio, length=length))
+    segment, offset = lag_segment(cepstrum, pattern_length, lag_range)
+    return segment, offset, rate
+
+
+def rank_batch(
+    segments: np.ndarray,
+    offset: int,
+    watermarks: tuple | None,
+    registry: str | None,
+    top: int,
+) -> list[list[dict]]:
+    if watermarks:
+        tables = rank_segments(segments, offset, _patterns(watermarks))
+        for table in tables:
+            table.insert(0, "watermark", list(watermarks))
+        return [_top(table, top).to_dict("records") for table in tables]
+
+    with WatermarkRegistry(registry) as keys:
+        if len(keys) == 0:
+            raise ValueError("Registry is empty.")
+        best = [None] * len(segments)
+        for start in range(0, len(keys), KEY_BATCH):
+            patterns = keys.patterns(start, start + KEY_BATCH)
+            for i, table in enumerate(rank_segments(segments, offset, patterns)):
+                table.insert(0, "row", np.arange(start, start + len(table)))
+                best[i] = _top(pd.concat([best[i], table]), top)
+
+        results = []
+        for table in best:
+            records = keys.records(table["row"])
+            table.insert(1, "watermark", [record["watermark"] for record in records])
+            table.insert(2, "asset", [record["asset"] for record in records])
+            results.append(table.to_dict("records"))
+    return results
+
+
+@lru_cache(maxsize=16)
+def _patterns(watermarks: tuple) -> np.ndarray:
+    return np.stack([watermark_to_bipolar(watermark) for watermark in watermarks])
+
+
+def _top(table: pd.DataFrame, top: int) -> pd.DataFrame:
+    return table.sort_values(["detected", "snr_ratio"], ascending=False).head(top)
@@ -0,0 +1,69 @@
+import io
+
+import numpy as np
+import streamlit as st
+from scipy.io import wavfile
+
+from logic.cache import LRUCache, content_hash
+from logic.corpus import Corpus
+from logic.detect import detect_watermark
+from logic.profiling import record, stage
+from logic.utils import audio_to_mp3_buffer, cepstrum, normalize_audio
+
+CACHE_BYTES = 1024**3
+
+
+@st.cache_resource
+def shared_cache() -> LRUCache:
+    return LRUCache(CACHE_BYTES)
+
+
+def decode_wav(data: bytes, mono: bool = False) -> tuple[str, int, np.ndarray]:
+    key = content_hash(data)
+    rate, audio = shared_cache().get_or_compute(
+        ("wav", key, mono), _decode_wav, data, mono
+    )
+    return f"{key}:{int(mono)}", rate, audio
+
+
+def load_example(name: str) -> tuple[str, np.ndarray, int]:
+    with Corpus() as corpus:
+        audio, sr = corpus.example(name)
+    return f"example:{name}", audio, sr
+
+
+def cached_cepstrum(key: str, audio: np.ndarray, length: int | None = None):
+    return shared_cache().get_or_compute(
+        ("cepstrum", key, length), cepstrum, audio, length, workers=-1
+    )
+
+
+def mp3_preview(key: str, audio: np.ndarray, sr: int) -> bytes:
+    return shared_cache().get_or_compute(
+        ("mp3", key, sr),
+        lambda: audio_to_mp3_buffer(audio, sr).getvalue(),
+    )
+
+
+def cached_detection(key: str, audio: np.ndarray, rate: int, **params) -> dict:
+    params_key = tuple(sorted(params.items()))
+    return shared_cache().get_or_compute(
+        ("detect", key, rate, params_key),
+        detect_watermark,
+        audio=audio,
+        rate=rate,
+        **params,
+    )
+
+
+def cached(key: tuple, func, *args, **kwargs):
+    return shared_cache().get_or_compute(key, func, *args, **kwargs)
+
+
+def _decode_wav(data: bytes, mono: bool) -> tuple[int, np.ndarray]:
+    with stage("decode") as entry, io.BytesIO(data) as f:
+        rate, audio = wavfile.read(f)
+        record(entry, audio, rate=rate)
+    if mono and audio.ndim > 1:
+        audio = audio[:, 0]
+    return rate, normalize_audio(audio)
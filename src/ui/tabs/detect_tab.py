@@ -1,11 +1,12 @@
 import io
 
-import matplotlib.pyplot as plt
+import pandas as pd
 import streamlit as st
-from scipy.io import wavfile
 
-from logic.detect import detect_watermark
-from logic.utils import normalize_audio
+from logic.detect import detect_segments, detect_watermark
+from ui.cache import cached, cached_detection, decode_wav
+
+ENVELOPE_POINTS = 2000
 
 
 class DetectTab:
@@ -14,26 +15,22 @@ class DetectTab:
     def __init__(self):
         super().__init__()
         st.subheader(self.title)
-        self.audio, self.rate = self.__upload_audio_section()
-        method, expected_watermark = self.__method_selection_section()
-        self.__detection_section(method, expected_watermark)
+        self.key, self.audio, self.rate = self.__upload_audio_section()
+        method, expected_watermark, lag_range = self.__method_selection_section()
+        self.__detection_section(method, expected_watermark, lag_range)
 
     def __upload_audio_section(self):
         st.markdown("### 📁 Upload audio file to analyze (WAV)")
         audio_file = st.file_uploader(
             "Choose a WAV audio file", type=["wav"], key="detect_audio"
         )
-        audio, rate = None, None
+        key, audio, rate = None, None, None
         if audio_file:
-            bytes_data = audio_file.read()
-            with io.BytesIO(bytes_data) as f:
-                rate, audio = wavfile.read(f)
-            if audio.ndim > 1:
-                audio = audio[:, 0]
-            audio = normalize_audio(audio)
+            bytes_data = audio_file.getvalue()
+            key, rate, audio = decode_wav(bytes_data)
             st.audio(bytes_data, format="audio/wav")
             st.success("✅ Audio file loaded successfully.")
-        return audio, rate
+        return key, audio, rate
 
     def __method_selection_section(self):
         st.markdown("### 🧠 Select watermark detection method")
@@ -42,7 +39,7 @@ class DetectTab:
             ["Simple Echo", "Time-Spread Echo"],
             help="Choose how to analyze the audio for embedded watermark.",
         )
-        expected_watermark = None
+        expected_watermark, lag_range = None, None
         if method == "Time-Spread Echo":
             expected_watermark = st.text_area(
                 "Paste expected 1024-bit watermark HEX (256 hex chars)",
@@ -51,10 +48,21 @@ class DetectTab:
             )
             if expected_watermark:
                 expected_watermark = expected_watermark.strip()
-        return method, expected_watermark
+            lag_range = st.slider(
+                "Echo delay search range (delta, samples)", 10, 300, (10, 300), step=1
+            )
+        return method, expected_watermark, lag_range
 
-    def __detection_section(self, method, expected_watermark):
+    def __detection_section(self, method, expected_watermark, lag_range):
         st.markdown("### 🔍 Detect watermark")
+        localize = st.checkbox(
+            "📍 Localize watermark (sliding window)",
+            help="Score overlapping 2 s windows to find where the watermark is.",
+        )
+        instrument = st.checkbox(
+            "⏱️ Collect performance data",
+            help="Time each detection stage and measure its memory use.",
+        )
         if st.button("🚀 Run detection"):
             if self.audio is None:
                 st.error("❌ Please upload an audio file first.")
@@ -65,15 +73,43 @@ class DetectTab:
                 st.error("❌ Please provide a valid 256-character HEX watermark.")
                 return
             detection_method = "simple" if method == "Simple Echo" else "time-spread"
-            result = detect_watermark(
-                audio=self.audio,
-                rate=self.rate,
-                method=detection_method,
-                expected_watermark_hex=expected_watermark,
-            )
-            self.__show_results(result)
+            lag_range = (lag_range[0], lag_range[1] + 1) if lag_range else None
+            params = {
+                "method": detection_method,
+                "expected_watermark_hex": expected_watermark,
+                "lag_range": lag_range,
+                "envelope": ENVELOPE_POINTS,
+            }
+            if instrument:
+                result = detect_watermark(
+                    self.audio, self.rate, instrument=True, **params
+                )
+            else:
+                result = cached_detection(self.key, self.audio, self.rate, **params)
+            plot_key = ("correlation", self.key, expected_watermark, lag_range)
+            self.__show_results(result, plot_key)
+            if instrument:
+                with st.expander("⏱️ Performance"):
+                    st.dataframe(pd.DataFrame(result["performance"]), hide_index=True)
+            if localize:
+                segments = cached(
+                    (
+                        "segments",
+                        self.key,
+                        detection_method,
+                        expected_watermark,
+                        lag_range,
+                    ),
+                    detect_segments,
+                    self.audio,
+                    self.rate,
+                    method=detection_method,
+                    expected_watermark_hex=expected_watermark,
+                    lag_range=lag_range or (20, 500),
+                )
+                self.__show_segments(segments)
 
-    def __show_results(self, result):
+    def __show_results(self, result, plot_key):
         st.markdown("### 📊 Detection Results")
         if result["detected"]:
             st.success("✅ Watermark detected in the audio!")
@@ -83,13 +119,45 @@ class DetectTab:
         st.write("**Peak index:**", result.get("peak_index"))
         st.write("**Peak time (s):**", f"{result.get('peak_time_s', 0):.6f}")
         st.write("**Peak value:**", result.get("peak_value"))
-        if result["method"] == "time-spread":
-            st.write(
-                "**Correlation length:**", len(result.get("correlation_signal", []))
+        if "channels" in result:
+            st.write("**Channel fusion:**", result["fusion"])
+            st.dataframe(result["channels"], hide_index=True)
+        if "correlation_envelope" in result:
+            st.write("**Correlation length:**", result["correlation_length"])
+            png = cached(
+                plot_key,
+                self.__plot_correlation,
+                result["correlation_envelope"],
+                result["correlation_zoom"],
+                result["peak_index"],
             )
-            fig, ax = plt.subplots(figsize=(10, 3))
-            ax.plot(result["correlation_signal"])
-            ax.set_title("Cepstrum cross-correlation with watermark pattern")
+            st.image(png)
+
+    @staticmethod
+    def __plot_correlation(
+        envelope: pd.DataFrame, zoom: pd.DataFrame, peak_index: int
+    ) -> bytes:
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(10, 5), layout="constrained")
+        full, near = fig.subplots(2, 1)
+        full.fill_between(envelope["lag"], envelope["min"], envelope["max"], lw=0.5)
+        full.set_title("Cepstrum cross-correlation with watermark pattern")
+        near.plot(zoom["lag"], zoom["value"])
+        near.axvline(peak_index, color="tab:red", ls="--", lw=1)
+        near.set_title("Around the peak")
+        for ax in (full, near):
             ax.set_xlabel("Lag (samples)")
             ax.set_ylabel("Correlation amplitude")
-            st.pyplot(fig)
+        with io.BytesIO() as buffer:
+            fig.savefig(buffer, format="png", dpi=100)
+            return buffer.getvalue()
+
+    def __show_segments(self, result):
+        st.markdown("### 📍 Watermark location")
+        windows = result["windows"]
+        st.line_chart(windows, x="start_s", y="z_score")
+        if result["segments"].empty:
+            st.info("No watermarked segments found.")
+        else:
+            st.dataframe(result["segments"], hide_index=True)
@@ -1,12 +1,14 @@
-import io
+import tempfile
 from enum import StrEnum
+from pathlib import Path
 
-import soundfile as sf
 import streamlit as st
-from scipy.io import wavfile
 
-from logic.embed import embed_echo, generate_watermark
-from logic.utils import normalize_audio
+from logic.audio_io import embed_echo_file
+from logic.cache import content_hash
+from logic.embed import generate_watermark
+from logic.profiling import profiled
+from ui.cache import cached
 
 
 class EchoType(StrEnum):
@@ -81,6 +83,10 @@ class EmbedTab:
     def __embed_audio_section(self, method, alpha, delta):
         st.markdown("### 📥 Embed Watermark into Audio")
 
+        instrument = st.checkbox(
+            "⏱️ Collect performance data",
+            help="Time each embedding stage and measure its memory use.",
+        )
         if st.button("💾 Embed Watermark"):
             if st.session_state.audio_bytes is None:
                 st.error("❌ Please upload an audio file first.")
@@ -95,23 +101,39 @@ class EmbedTab:
                 st.error("❌ Please paste or generate a watermark first.")
                 return
 
-            rate, audio = wavfile.read(io.BytesIO(st.session_state.audio_bytes))
-            audio = normalize_audio(audio)
-
-            watermarked = embed_echo(audio, alpha, delta, wm_hex)
-
-            out_buffer = io.BytesIO()
-            sf.write(out_buffer, watermarked, rate, format="WAV")
+            audio_bytes = st.session_state.audio_bytes
+            if instrument:
+                with profiled() as profiler:
+                    watermarked = self.__embed(audio_bytes, alpha, delta, wm_hex)
+                with st.expander("⏱️ Performance"):
+                    st.dataframe(profiler.table(), hide_index=True)
+            else:
+                watermarked = cached(
+                    ("embed", content_hash(audio_bytes), alpha, delta, wm_hex),
+                    self.__embed,
+                    audio_bytes,
+                    alpha,
+                    delta,
+                    wm_hex,
+                )
 
             st.markdown("#### Watermarked audio")
-            st.audio(out_buffer.getvalue(), format="audio/wav")
+            st.audio(watermarked, format="audio/wav")
             st.download_button(
                 "⬇️ Download watermarked audio",
-                out_buffer.getvalue(),
+                watermarked,
                 "watermarked.wav",
                 "audio/wav",
             )
 
+    @staticmethod
+    def __embed(audio_bytes: bytes, alpha: float, delta: int, wm_hex: str | None):
+        with tempfile.TemporaryDirectory() as tmp:
+            source, target = Path(tmp, "input.wav"), Path(tmp, "watermarked.wav")
+            source.write_bytes(audio_bytes)
+            embed_echo_file(source, target, alpha, delta, wm_hex)
+            return target.read_bytes()
+
     @staticmethod
     def __validate_hex_string(value: str) -> bool:
         return len(value) == 256 and all(c in "0123456789abcdefABCDEF" for c in value)
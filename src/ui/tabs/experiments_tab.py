@@ -1,8 +1,100 @@
 import streamlit as st
 
+from logic.experiments import (
+    corpus_tracks,
+    parameter_grid,
+    run_experiments,
+    save_results,
+    summarize,
+)
+
 
 class ExperimentsTab:
     title = "🔬 Experiments"
 
     def __init__(self):
         st.subheader(ExperimentsTab.title)
+        st.session_state.setdefault("experiment_results", None)
+        tracks, max_seconds = self.__corpus_section()
+        grid = self.__grid_section()
+        self.__run_section(tracks, grid, max_seconds)
+        self.__results_section()
+
+    def __corpus_section(self):
+        st.markdown("### 📂 Corpus")
+        root = st.text_input("Directory with audio files", value="data/0_raw")
+        tracks = corpus_tracks(root) if root else []
+        st.write(f"Found **{len(tracks)}** audio files.")
+        max_seconds = st.number_input(
+            "Use only the first N seconds of each track (0 = whole track)",
+            min_value=0.0,
+            value=30.0,
+            step=5.0,
+        )
+        return tracks, max_seconds or None
+
+    def __grid_section(self):
+        st.markdown("### 🧮 Parameter grid")
+        col1, col2 = st.columns(2)
+        with col1:
+            alphas = self.__parse_list("Alpha values", "0.005, 0.01, 0.02, 0.05", float)
+            deltas = self.__parse_list("Delta values (samples)", "50, 75, 150", int)
+            lengths = self.__parse_list("Pattern lengths (bits)", "256, 1024", int)
+        with col2:
+            methods = st.multiselect(
+                "Methods", ["simple", "time-spread"], default=["time-spread"]
+            )
+            sigma_factors = self.__parse_list("Sigma factors", "3, 4, 5", float)
+            snr_thresholds = self.__parse_list("SNR thresholds", "5", float)
+        grid = parameter_grid(
+            alphas, deltas, lengths, methods, sigma_factors, snr_thresholds
+        )
+        st.write(f"The grid has **{len(grid)}** parameter combinations.")
+        return grid
+
+    def __run_section(self, tracks, grid, max_seconds):
+        st.markdown("### 🚀 Run")
+        if st.button("Run experiments"):
+            if not tracks or not grid:
+                st.error("❌ Please provide a corpus and at least one grid point.")
+                return
+            bar = st.progress(0.0, text="Starting...")
+
+            def progress(done, total):
+                bar.progress(done / total, text=f"{done}/{total} embeddings")
+
+            results = run_experiments(
+                tracks, grid, max_seconds=max_seconds, progress=progress
+            )
+            path = save_results(results)
+            st.session_state.experiment_results = results
+            st.success(f"✅ {len(results)} detections saved to {path}")
+
+    def __results_section(self):
+        results = st.session_state.experiment_results
+        if results is None:
+            return
+        st.markdown("### 📊 Results")
+        summary = summarize(results)
+        st.dataframe(summary, use_container_width=True)
+        st.markdown("#### True positive rate by alpha")
+        st.line_chart(
+            summary.groupby(["alpha", "method"])["true_positive_rate"]
+            .mean()
+            .unstack("method")
+        )
+        st.download_button(
+            "⬇️ Download results (CSV)",
+            results.to_csv(index=False),
+            "experiments.csv",
+            "text/csv",
+        )
+
+    @staticmethod
+    def __parse_list(label: str, default: str, cast) -> list:
+        value = st.text_input(label, value=default)
+        try:
+            return [cast(item) for item in value.split(",") if item.strip()]
+        except ValueError:
+            st.error(f"❌ {label} must be a comma separated list of numbers.")
+            return []
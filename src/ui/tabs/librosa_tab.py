@@ -1,10 +1,10 @@
-import librosa
 import numpy as np
 import streamlit as st
 
-from logic.embed import embed_echo
-from logic.utils import cepstrum
-from logic.utils import normalize_audio, audio_to_mp3_buffer
+from logic.corpus import Corpus
+from logic.embed import add_echoes
+from logic.utils import normalize_audio
+from ui.cache import cached, cached_cepstrum, load_example, mp3_preview
 
 
 class LibrosaTab:
@@ -12,8 +12,8 @@ class LibrosaTab:
 
     def __init__(self):
         st.subheader(self.title)
-        self.audio, self.sr = self.__audio_selection_section()
-        self.__display_original_audio(self.audio, self.sr)
+        self.key, self.audio, self.sr = self.__audio_selection_section()
+        self.__display_original_audio()
         self.__manage_echo_sliders()
         self.__apply_echoes_and_display_results()
 
@@ -34,22 +34,29 @@ class LibrosaTab:
             "Kevin MacLeod - Vibe Ace": "vibeace",
         }
 
+        examples = set(title_desc.values())
+        with Corpus() as corpus:
+            title_desc.update({name: name for name in corpus if name not in examples})
+
         audio_title = st.radio("🎵 Pick example from librosa", title_desc.keys())
         audio_name = title_desc[audio_title]
 
-        audio, sr = librosa.load(
-            librosa.example(audio_name, hq=True), sr=None, mono=True
-        )
-        audio = normalize_audio(audio)
+        try:
+            key, audio, sr = load_example(audio_name)
+        except Exception as e:
+            st.error(
+                f"❌ Could not load {audio_name}: {e}. "
+                "Run `python src/cli.py corpus examples` once while online."
+            )
+            st.stop()
         st.write(f"Sample rate: {sr} Hz | Shape: {audio.shape}")
-        return audio, sr
+        return key, audio, sr
 
-    def __display_original_audio(self, audio: np.ndarray, sr: int):
-        buffer = audio_to_mp3_buffer(audio, sr)
-        st.audio(buffer, format="audio/mp3")
+    def __display_original_audio(self):
+        st.audio(mp3_preview(self.key, self.audio, self.sr), format="audio/mp3")
 
         st.markdown("#### 🔍 Cepstrum (Original Audio)")
-        st.line_chart(cepstrum(audio)[:200])
+        st.line_chart(cached_cepstrum(self.key, self.audio, 200))
 
     def __manage_echo_sliders(self):
         st.session_state.setdefault("num_boxes", 0)
@@ -85,15 +92,15 @@ class LibrosaTab:
                     del st.session_state.sliders[box_id]
 
     def __apply_echoes_and_display_results(self):
-        echo_audio = np.copy(self.audio)
-
-        for alpha, delta in st.session_state.sliders.values():
-            echo_audio = embed_echo(echo_audio, alpha, delta)
-
-        echo_audio = normalize_audio(echo_audio)
+        taps = tuple(tuple(tap) for tap in st.session_state.sliders.values())
+        echo_key = f"{self.key}|echo{taps}"
+        echo_audio = cached(("echo", echo_key), self.__apply_echoes, self.audio, taps)
 
         st.markdown("#### 🔁 Cepstrum (With Echo)")
-        st.line_chart(cepstrum(echo_audio)[:200])
+        st.line_chart(cached_cepstrum(echo_key, echo_audio, 200))
+
+        st.audio(mp3_preview(echo_key, echo_audio, self.sr), format="audio/mp3")
 
-        buffer_echo = audio_to_mp3_buffer(echo_audio, self.sr)
-        st.audio(buffer_echo, format="audio/mp3")
+    @staticmethod
+    def __apply_echoes(audio: np.ndarray, taps: tuple) -> np.ndarray:
+        return normalize_audio(add_echoes(audio, list(taps)))
@@ -11,8 +11,10 @@ class UI:
             layout="wide",
         )
         tab_classes = [EmbedTab, DetectTab, ExperimentsTab, LibrosaTab, HelpTab]
-        st_tabs = st.tabs([tab.title for tab in tab_classes])
-
-        for st_tab, tab_class in zip(st_tabs, tab_classes):
-            with st_tab:
-                tab_class()
+        pages = [
+            st.Page(
+                tab_class, title=tab_class.title, url_path=tab_class.__name__.lower()
+            )
+            for tab_class in tab_classes
+        ]
+        st.navigation(pages, position="top").run()
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+import soundfile as sf
+
+from src.logic.attacks import (
+    DEFAULT_ATTACKS,
+    apply_attack,
+    attack_file,
+    attack_summary,
+    parse_attack,
+)
+from src.logic.batch import run_parallel
+from src.logic.embed import add_echo, watermark_to_bipolar
+
+WATERMARK = "9f3c" * 16
+
+
+def _noise(seconds=2.0, rate=16000):
+    return (0.1 * np.random.default_rng(0).normal(size=int(seconds * rate))).astype(
+        np.float32
+    )
+
+
+@pytest.mark.parametrize("spec", DEFAULT_ATTACKS[:-1])
+def test_attacks_keep_length(spec):
+    audio = _noise(rate=48000)
+
+    attacked = apply_attack(audio, 48000, spec)
+
+    assert attacked.dtype == np.float32
+    assert abs(len(attacked) - len(audio)) < 2000
+    assert np.all(np.isfinite(attacked))
+
+
+@pytest.mark.parametrize("rate", [16000, 44100])
+def test_mp3_attack_degrades_with_lower_bitrate(rate):
+    audio = _noise(rate=rate)
+
+    errors = [
+        np.mean((apply_attack(audio, rate, f"mp3:{bitrate}") - audio) ** 2)
+        for bitrate in (320, 128, 64)
+    ]
+
+    assert errors[0] < errors[1] < errors[2]
+
+
+def test_noise_attack_matches_snr():
+    audio = _noise()
+
+    noise = apply_attack(audio, 16000, "noise:20") - audio
+
+    snr = 10 * np.log10(np.mean(audio**2) / np.mean(noise**2))
+    assert snr == pytest.approx(20, abs=0.2)
+
+
+def test_crop_and_unknown_attack():
+    assert len(apply_attack(_noise(), 16000, "crop:0.5")) == 8000
+    with pytest.raises(ValueError):
+        parse_attack("reverb:1")
+
+
+def test_attack_pipeline_reports_detection_rates(tmp_path):
+    audio = add_echo(_noise(), 0.05, 75, watermark_to_bipolar(WATERMARK))
+    sf.write(tmp_path / "marked.wav", audio, 16000, subtype="FLOAT")
+    attacks = ["none", "mp3:128", "noise:30", "lowpass:6000"]
+    jobs = [
+        (str(tmp_path / "marked.wav"), {"attack": spec, "watermark": WATERMARK})
+        for spec in attacks
+    ]
+
+    rows = list(run_parallel(attack_file, jobs, workers=2))
+    summary = attack_summary(pd.DataFrame(rows))
+
+    assert not any("error" in row for row in rows)
+    assert set(summary["attack"]) == set(attacks)
+    assert summary.set_index("attack").loc["none", "detection_rate"] == 1.0
+
+
+def test_attack_summary_counts_failed_attacks(tmp_path):
+    sf.write(tmp_path / "marked.wav", _noise(), 16000, subtype="FLOAT")
+    (tmp_path / "broken.wav").write_text("not audio")
+    jobs = [
+        (str(tmp_path / name), {"attack": spec, "watermark": WATERMARK})
+        for name in ["marked.wav", "broken.wav"]
+        for spec in ["none", "noise:30"]
+    ]
+
+    rows = list(run_parallel(attack_file, jobs, workers=2, keys=("attack",)))
+    summary = attack_summary(pd.DataFrame(rows)).set_index("attack")
+
+    errors = [row for row in rows if "error" in row]
+    assert sorted(row["attack"] for row in errors) == ["noise:30", "none"]
+    assert summary.loc["none", "failed"] == 1
+    assert summary.loc["noise:30", "files"] == 1
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.logic.audio_io import (
+    BlockEcho,
+    embed_echo_file,
+    iter_blocks,
+    open_audio,
+    stream_peak,
+)
+from src.logic.embed import add_echo, generate_watermark, watermark_to_bipolar
+from src.logic.utils import normalize_audio
+
+
+def _track(path, channels=2, subtype="FLOAT", seconds=1.0, rate=8000):
+    rng = np.random.default_rng(0)
+    audio = (0.3 * rng.normal(size=(int(seconds * rate), channels))).clip(-1, 1)
+    sf.write(path, audio.astype(np.float32), rate, subtype=subtype)
+    return audio.astype(np.float32)
+
+
+@pytest.mark.parametrize("block_size", [37, 1000, 100_000])
+def test_block_echo_matches_add_echo(block_size):
+    rng = np.random.default_rng(1)
+    audio = rng.uniform(-0.1, 0.1, size=(5000, 2)).astype(np.float32)
+    pattern = watermark_to_bipolar(generate_watermark(64))
+
+    echo = BlockEcho(0.05, 30, pattern, channels=2)
+    blocks = [
+        echo.process(audio[i : i + block_size])
+        for i in range(0, len(audio), block_size)
+    ]
+
+    expected = add_echo(audio, 0.05, 30, pattern)
+    np.testing.assert_allclose(np.concatenate(blocks), expected, atol=1e-6)
+
+
+def test_open_audio_is_memory_mapped(tmp_path):
+    _track(tmp_path / "a.wav", subtype="PCM_16")
+    rate, audio = open_audio(tmp_path / "a.wav")
+
+    assert rate == 8000
+    assert isinstance(audio, np.memmap)
+    assert audio.shape == (8000, 2)
+    assert stream_peak(audio, block_size=999) == np.max(np.abs(audio.astype(float)))
+
+
+def test_open_audio_streams_unmappable_wav(tmp_path):
+    audio = _track(tmp_path / "a.wav", subtype="PCM_24")
+    rate, f = open_audio(tmp_path / "a.wav")
+
+    with f:
+        assert rate == 8000
+        assert isinstance(f, sf.SoundFile)
+        blocks = list(iter_blocks(f, block_size=999))
+        assert stream_peak(f, block_size=999) == np.max(np.abs(np.concatenate(blocks)))
+    np.testing.assert_allclose(np.concatenate(blocks), audio, atol=1e-6)
+
+
+@pytest.mark.parametrize("subtype", ["FLOAT", "PCM_24"])
+@pytest.mark.parametrize("watermark", [None, generate_watermark(64)])
+def test_embed_echo_file_matches_in_memory(tmp_path, watermark, subtype):
+    audio = _track(tmp_path / "in.wav", subtype=subtype)
+
+    info = embed_echo_file(
+        tmp_path / "in.wav", tmp_path / "out.wav", 0.4, 25, watermark, block_size=777
+    )
+
+    written, rate = sf.read(tmp_path / "out.wav", dtype="float32")
+    pattern = watermark_to_bipolar(watermark) if watermark else None
+    expected = add_echo(normalize_audio(audio), 0.4, 25, pattern)
+    assert info["samples"] == len(audio)
+    assert not (tmp_path / "out.wav.part").exists()
+    np.testing.assert_allclose(written, expected, atol=1e-5)
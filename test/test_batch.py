@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.logic.batch import (
+    EMBED_FIELDS,
+    ResultWriter,
+    embed_file,
+    iter_audio_files,
+    run_parallel,
+)
+
+
+def _write_tracks(root, count=3):
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        audio = 0.1 * rng.normal(size=(8000, 2))
+        sf.write(root / f"track_{i}.wav", audio, 8000, subtype="PCM_16")
+
+
+def test_result_writer_resumes_jsonl(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with ResultWriter(path, EMBED_FIELDS) as writer:
+        writer.write({"file": "a.wav"})
+        writer.write({"file": "b.wav", "error": "broken"})
+    with open(path, "a") as f:
+        f.write('{"file": "c.wa')
+
+    with ResultWriter(path, EMBED_FIELDS) as writer:
+        assert writer.done == {"a.wav"}
+
+
+def test_result_writer_resumes_csv(tmp_path):
+    path = tmp_path / "results.csv"
+    with ResultWriter(path, EMBED_FIELDS) as writer:
+        writer.write({"file": "a.wav", "alpha": 0.1})
+    with ResultWriter(path, EMBED_FIELDS) as writer:
+        writer.write({"file": "b.wav", "alpha": 0.1})
+        assert writer.done == {"a.wav", "b.wav"}
+
+    assert path.read_text().count("file,output") == 1
+
+
+def test_result_writer_refuses_other_parameters(tmp_path):
+    path = tmp_path / "results.csv"
+    params = {"watermark": "ab", "lag_range": (10, 301)}
+    with ResultWriter(path, EMBED_FIELDS, params=params) as writer:
+        writer.write({"file": "a.wav"})
+    with ResultWriter(path, EMBED_FIELDS, params=dict(params)) as writer:
+        assert writer.done == {"a.wav"}
+
+    with pytest.raises(ValueError):
+        ResultWriter(path, EMBED_FIELDS, params={**params, "watermark": "cd"})
+    with pytest.raises(ValueError):
+        ResultWriter(path, EMBED_FIELDS, params={**params, "lag_range": (20, 101)})
+
+
+def test_run_parallel_embeds_directory(tmp_path):
+    _write_tracks(tmp_path)
+    (tmp_path / "broken.wav").write_text("not audio")
+    jobs = [
+        (
+            str(path),
+            {"target": str(tmp_path / "out" / path.name), "alpha": 0.1, "delta": 50},
+        )
+        for path in iter_audio_files(tmp_path)
+    ]
+
+    rows = {row["file"]: row for row in run_parallel(embed_file, jobs, workers=2)}
+
+    assert len(rows) == 4
+    assert "error" in rows[str(tmp_path / "broken.wav")]
+    written, rate = sf.read(tmp_path / "out" / "track_0.wav")
+    assert written.shape == (8000, 2)
+    assert rate == 8000
@@ -0,0 +1,50 @@
+import numpy as np
+
+from src.logic.cache import LRUCache, content_hash
+
+
+def test_content_hash_depends_on_content_dtype_and_shape():
+    audio = np.arange(8, dtype=np.float32)
+
+    assert content_hash(audio) == content_hash(audio.copy())
+    assert content_hash(audio) != content_hash(audio.astype(np.float64))
+    assert content_hash(audio) != content_hash(audio.reshape(4, 2))
+    assert content_hash(b"abc") != content_hash(b"abd")
+
+
+def test_get_or_compute_runs_once():
+    cache = LRUCache(max_bytes=1024)
+    calls = []
+
+    def compute(n):
+        calls.append(n)
+        return np.zeros(n)
+
+    first = cache.get_or_compute("a", compute, 4)
+    second = cache.get_or_compute("a", compute, 4)
+
+    assert first is second
+    assert calls == [4]
+    assert cache.hits == 1 and cache.misses == 1
+    assert not first.flags.writeable
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(max_bytes=3 * 80)
+    for key in "abc":
+        cache.put(key, np.zeros(10))
+    cache.get("a")
+    cache.put("d", np.zeros(10))
+
+    assert "a" in cache and "d" in cache
+    assert "b" not in cache
+    assert cache.nbytes == 3 * 80
+
+
+def test_value_larger_than_cache_is_not_stored():
+    cache = LRUCache(max_bytes=100)
+    value = cache.put("big", b"x" * 1000)
+
+    assert value == b"x" * 1000
+    assert len(cache) == 0
+    assert cache.nbytes == 0
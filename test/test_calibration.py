@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.logic.calibration import (
+    auroc,
+    calibrate,
+    collect_scores,
+    load_profile,
+    roc_curve,
+    save_profile,
+    threshold_at_fpr,
+)
+from src.logic.detect import detect_watermark
+from src.logic.embed import add_echo, watermark_to_bipolar
+
+
+def test_roc_curve_and_auroc_separate_scores():
+    positives = np.array([0.9, 0.8, 0.7])
+    negatives = np.array([0.1, 0.2, 0.75])
+
+    fpr, tpr, thresholds = roc_curve(positives, negatives)
+
+    assert fpr[0] == tpr[0] == 0.0
+    assert fpr[-1] == tpr[-1] == 1.0
+    assert np.all(np.diff(fpr) >= 0) and np.all(np.diff(tpr) >= 0)
+    assert np.isinf(thresholds[0])
+    assert auroc(positives, negatives) == pytest.approx(8 / 9)
+    assert auroc(positives, positives) == pytest.approx(0.5)
+
+
+def test_threshold_at_fpr_bounds_false_positives():
+    negatives = np.random.default_rng(0).normal(size=10_000)
+
+    threshold = threshold_at_fpr(negatives, 0.01)
+
+    assert np.mean(negatives > threshold) <= 0.01
+    with pytest.raises(ValueError):
+        threshold_at_fpr(negatives, 0.0)
+
+
+def test_calibrated_profile_drives_detection(tmp_path):
+    rng = np.random.default_rng(0)
+    for i in range(2):
+        sf.write(tmp_path / f"track_{i}.wav", 0.1 * rng.normal(size=16_000), 8000)
+    tracks = sorted(str(path) for path in tmp_path.glob("*.wav"))
+
+    positives, negatives = collect_scores(
+        tracks, 0.05, 75, bits=256, wrong_keys=4, workers=2
+    )
+    profile = calibrate(positives, negatives, target_fpr=0.1, lag_range=(10, 301))
+    path = save_profile(profile, tmp_path / "profile.json")
+
+    assert positives.shape == (2, 3)
+    assert negatives.shape == (2 * 9, 3)
+    assert profile["auroc"]["z_score"] > 0.9
+    assert profile["false_positive_rate"] <= 0.1
+    assert load_profile(path) == profile
+
+    watermark = rng.integers(0, 256, size=32, dtype=np.uint8).tobytes().hex()
+    audio = add_echo(
+        0.1 * rng.normal(size=16_000), 0.05, 75, watermark_to_bipolar(watermark)
+    )
+    strict = {**profile, "sigma_factor": 1e6}
+    assert detect_watermark(
+        audio, 8000, expected_watermark_hex=watermark, profile=profile
+    )["detected"]
+    assert not detect_watermark(
+        audio, 8000, expected_watermark_hex=watermark, profile=strict
+    )["detected"]
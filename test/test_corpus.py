@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.logic.corpus import Corpus, read_track
+from src.logic.experiments import corpus_tracks, load_track
+
+
+def test_corpus_stores_memory_mapped_tracks(tmp_path):
+    audio = np.random.default_rng(0).uniform(-1, 1, size=(8000, 2))
+    Corpus(tmp_path).add("noise", audio, 8000, "generated")
+
+    corpus = Corpus(tmp_path)
+    track, rate = corpus.load("noise")
+
+    assert "noise" in corpus and list(corpus) == ["noise"]
+    assert isinstance(track, np.memmap) and track.dtype == np.float32
+    assert rate == 8000
+    assert np.allclose(track, audio)
+    assert corpus.info("noise")["channels"] == 2
+    with pytest.raises(ValueError):
+        corpus.load("missing")
+    with pytest.raises(ValueError):
+        corpus.add("../escape", audio, 8000)
+
+
+def test_corpus_instances_do_not_overwrite_each_other(tmp_path):
+    audio = np.zeros(800, dtype=np.float32)
+    first, second = Corpus(tmp_path), Corpus(tmp_path)
+    first.add("a", audio, 8000)
+    second.add("b", audio, 8000)
+    first.add("c", audio, 8000)
+
+    assert list(Corpus(tmp_path)) == ["a", "b", "c"]
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_corpus_tracks_are_served_to_experiments(tmp_path):
+    sf.write(tmp_path / "song.wav", 0.1 * np.ones(4000), 8000)
+    corpus = Corpus(tmp_path / "corpus")
+    corpus.add_file(tmp_path / "song.wav")
+
+    tracks = corpus_tracks(tmp_path / "corpus")
+    audio, rate = load_track(tracks[0], max_seconds=0.25)
+
+    assert tracks == [str(corpus.path("song"))]
+    assert rate == 8000 and len(audio) == 2000
+    assert np.allclose(read_track(tracks[0])[0], 1.0)
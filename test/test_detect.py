@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import get_window
+
+from src.logic.detect import (
+    compute_cepstrum,
+    correlate_pattern,
+    correlate_patterns,
+    detect_segments,
+    detect_watermark,
+    detect_watermarks,
+    iter_window_cepstra,
+)
+from src.logic.embed import (
+    add_echo,
+    embed_echo,
+    generate_watermark,
+    watermark_to_bipolar,
+)
+from src.logic.utils import truncated_cepstra
+
+
+def _noise(seconds: float = 2.0, rate: int = 16_000, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(size=int(seconds * rate)).astype(np.float32)
+    return audio / np.max(np.abs(audio))
+
+
+def test_correlate_pattern_matches_numpy():
+    rng = np.random.default_rng(0)
+    signal = rng.normal(size=5000)
+    pattern = 2 * rng.integers(0, 2, size=256) - 1
+
+    corr = correlate_pattern(signal, pattern)
+
+    np.testing.assert_allclose(
+        corr, np.correlate(signal, pattern, mode="valid"), atol=1e-8
+    )
+
+
+def test_correlate_pattern_lag_range():
+    rng = np.random.default_rng(1)
+    signal = rng.normal(size=5000)
+    pattern = 2 * rng.integers(0, 2, size=256) - 1
+
+    corr = correlate_pattern(signal, pattern, lag_range=(10, 300))
+
+    expected = np.correlate(signal, pattern, mode="valid")[10:300]
+    np.testing.assert_allclose(corr, expected, atol=1e-8)
+
+
+def test_correlate_pattern_empty_range():
+    corr = correlate_pattern(np.zeros(100), np.ones(50), lag_range=(80, 90))
+    assert len(corr) == 0
+
+
+def test_time_spread_detection_in_lag_range():
+    audio = _noise()
+    watermark = generate_watermark(1024)
+    marked = embed_echo(audio, alpha=0.05, delta=75, watermark=watermark)
+
+    result = detect_watermark(
+        marked, 16_000, expected_watermark_hex=watermark, lag_range=(10, 300)
+    )
+
+    assert result["detected"]
+    assert result["peak_index"] == 75
+    assert result["correlation_offset"] == 10
+    assert len(result["correlation_signal"]) == 290
+
+
+def test_time_spread_clean_audio_not_detected():
+    audio = _noise()
+    watermark = np.random.default_rng(1).bytes(128).hex()
+
+    result = detect_watermark(
+        audio, 16_000, expected_watermark_hex=watermark, lag_range=(10, 300)
+    )
+
+    assert not result["detected"]
+
+
+def test_correlate_patterns_batch_matches_single():
+    rng = np.random.default_rng(2)
+    signal = rng.normal(size=3000)
+    patterns = 2 * rng.integers(0, 2, size=(5, 128)) - 1
+
+    batch = correlate_patterns(signal, patterns)
+    window = correlate_patterns(signal, patterns, lag_range=(10, 300))
+
+    for key, pattern in enumerate(patterns):
+        expected = np.correlate(signal, pattern, mode="valid")
+        np.testing.assert_allclose(batch[key], expected, atol=1e-8)
+        np.testing.assert_allclose(window[key], expected[10:300], atol=1e-8)
+
+
+def test_detect_watermarks_ranks_embedded_key_first():
+    audio = _noise()
+    rng = np.random.default_rng(1)
+    keys = [rng.bytes(128).hex() for _ in range(20)]
+    marked = embed_echo(audio, alpha=0.05, delta=75, watermark=keys[7])
+
+    table = detect_watermarks(marked, 16_000, keys, lag_range=(10, 300))
+    single = detect_watermark(
+        marked, 16_000, expected_watermark_hex=keys[7], lag_range=(10, 300)
+    )
+
+    assert len(table) == len(keys)
+    assert table.loc[0, "watermark"] == keys[7]
+    assert table["detected"].sum() == 1
+    for column in ["peak_index", "peak_value", "threshold", "snr_ratio", "local_max"]:
+        assert np.isclose(table.loc[0, column], single[column])
+
+
+def test_detect_watermarks_defaults_to_embed_delta_range():
+    audio = _noise()
+    rng = np.random.default_rng(2)
+    keys = [rng.bytes(128).hex() for _ in range(3)]
+    marked = embed_echo(audio, alpha=0.05, delta=75, watermark=keys[1])
+
+    table = detect_watermarks(marked, 16_000, keys)
+    bounded = detect_watermarks(marked, 16_000, keys, lag_range=(10, 301))
+
+    pd.testing.assert_frame_equal(table, bounded)
+
+
+def test_detect_segments_locates_watermarked_part():
+    rate = 16_000
+    watermark = np.random.default_rng(1).bytes(32).hex()
+    audio = 0.5 * _noise(seconds=12.0, rate=rate)
+    middle = slice(4 * rate, 8 * rate)
+    audio[middle] = add_echo(audio[middle], 0.05, 75, watermark_to_bipolar(watermark))
+
+    result = detect_segments(audio, rate, expected_watermark_hex=watermark)
+
+    windows = result["windows"]
+    assert result["detected"]
+    assert windows["start_s"].is_monotonic_increasing
+    assert len(result["segments"]) == 1
+    segment = result["segments"].iloc[0]
+    assert 2.0 <= segment["start_s"] <= 4.5
+    assert 7.5 <= segment["end_s"] <= 10.0
+    assert segment["peak_index"] == 75
+    assert not windows[windows["end_s"] < 3.5]["detected"].any()
+
+
+@pytest.mark.parametrize("batch", [3, 20, 512])
+def test_iter_window_cepstra_does_not_depend_on_batch(batch):
+    audio = _noise(seconds=3.0)
+    reference = list(iter_window_cepstra(audio, 25, 4, 64, batch=10_000))
+    chunks = list(iter_window_cepstra(audio, 25, 4, 64, batch=batch))
+
+    np.testing.assert_array_equal(
+        np.concatenate([c for c, _ in chunks]), reference[0][0]
+    )
+    np.testing.assert_allclose(
+        np.concatenate([w for _, w in chunks]), reference[0][1], atol=1e-9
+    )
+
+
+@pytest.mark.parametrize("window_frames, step_frames", [(5, 23), (25, 4), (7, 7)])
+def test_iter_window_cepstra_matches_frame_means(window_frames, step_frames):
+    audio = _noise(seconds=6.0)
+    frames = sliding_window_view(audio, 1024)[::512]
+    taper = get_window("hann", 1024, fftbins=True).astype(np.float32)
+    ceps = truncated_cepstra(frames, taper, 64)
+
+    chunks = list(
+        iter_window_cepstra(audio, window_frames, step_frames, 64, 1024, batch=16)
+    )
+
+    starts = np.concatenate([c for c, _ in chunks])
+    np.testing.assert_array_equal(
+        starts, np.arange(0, len(frames) - window_frames + 1, step_frames)
+    )
+    expected = [ceps[s : s + window_frames].mean(0, dtype=np.float64) for s in starts]
+    np.testing.assert_allclose(
+        np.concatenate([w for _, w in chunks]), expected, atol=1e-5
+    )
+
+
+def test_stereo_cepstrum_matches_per_channel_cepstra():
+    audio = np.stack([_noise(seed=0), _noise(seed=1)], axis=1)
+
+    cepstra = compute_cepstrum(audio)
+
+    assert cepstra.shape == audio.shape
+    np.testing.assert_allclose(cepstra[:, 1], compute_cepstrum(audio[:, 1]))
+
+
+def test_stereo_detection_fuses_channels():
+    watermark = generate_watermark(1024)
+    audio = np.stack([_noise(seed=0), _noise(seed=1)], axis=1)
+    marked = embed_echo(audio, alpha=0.02, delta=75, watermark=watermark)
+
+    fused = detect_watermark(
+        marked, 16_000, expected_watermark_hex=watermark, lag_range=(10, 300)
+    )
+    best = detect_watermark(
+        marked,
+        16_000,
+        expected_watermark_hex=watermark,
+        lag_range=(10, 300),
+        fusion="max",
+    )
+
+    assert fused["fusion"] == "mean"
+    assert fused["detected"] and fused["peak_index"] == 75
+    assert [channel["channel"] for channel in fused["channels"]] == [0, 1]
+    assert all(channel["peak_index"] == 75 for channel in fused["channels"])
+    assert fused["z_score"] > min(channel["z_score"] for channel in fused["channels"])
+    assert best["z_score"] == max(channel["z_score"] for channel in best["channels"])
+
+
+def test_time_spread_envelope_replaces_correlation_signal():
+    audio = _noise()
+    watermark = generate_watermark(1024)
+    marked = embed_echo(audio, alpha=0.05, delta=75, watermark=watermark)
+
+    full = detect_watermark(marked, 16_000, expected_watermark_hex=watermark)
+    lean = detect_watermark(
+        marked, 16_000, expected_watermark_hex=watermark, envelope=100
+    )
+
+    corr = full["correlation_signal"]
+    envelope = lean["correlation_envelope"]
+    assert "correlation_signal" not in lean
+    assert lean["correlation_length"] == len(corr)
+    assert len(envelope) == 100
+    assert envelope["max"].max() == corr.max()
+    assert envelope["min"].min() == corr.min()
+    zoom = lean["correlation_zoom"]
+    assert zoom["value"].max() == lean["peak_value"]
+    assert zoom["lag"].iloc[0] <= lean["peak_index"] <= zoom["lag"].iloc[-1]
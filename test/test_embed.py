@@ -1,6 +1,7 @@
 import numpy as np
+import pytest
 
-from src.logic.embed import add_echo
+from src.logic.embed import add_echo, add_echoes, watermark_to_bipolar
 
 
 def test_shape_is_preserved():
@@ -87,8 +88,8 @@ def test_time_spread_mono_simple():
 
     out = add_echo(data, alpha, delta, pattern)
 
-    expected = np.array([0.5, -0.5 + 0.25, 0.0 + 0.25, 0.0], dtype=np.float32)
-    np.testing.assert_allclose(out, expected, atol=1e-7)
+    expected = np.array([0.5, -0.5 + 0.25, 0.0 - 0.5, 0.0 + 0.25], dtype=np.float32)
+    np.testing.assert_allclose(out, expected, atol=1e-6)
 
 
 def test_time_spread_stereo_simple():
@@ -111,12 +112,12 @@ def test_time_spread_stereo_simple():
         [
             [0.5, -0.5],
             [0.0 + 0.25, 0.0 - 0.25],
-            [-0.5, 0.5],
-            [0.0, 0.0],
+            [-0.5 - 0.25, 0.5 + 0.25],
+            [0.0 - 0.25, 0.0 + 0.25],
         ],
         dtype=np.float32,
     )
-    np.testing.assert_allclose(out, expected, atol=1e-7)
+    np.testing.assert_allclose(out, expected, atol=1e-6)
 
 
 def test_time_spread_too_large_delta():
@@ -134,6 +135,99 @@ def test_time_spread_long_pattern_truncated():
 
     out = add_echo(data, alpha, delta, pattern)
 
-    expected = np.array([0.5, -0.5, 0.25, 0.25], dtype=np.float32)
+    expected = np.array([0.5, -0.5, 0.25, -0.5], dtype=np.float32)
+
+    np.testing.assert_allclose(out, expected, atol=1e-6)
+
+
+def test_time_spread_matches_direct_convolution():
+    rng = np.random.default_rng(0)
+    data = rng.uniform(-0.5, 0.5, size=(4000, 2)).astype(np.float32)
+    pattern = 2 * rng.integers(0, 2, size=64) - 1
+    alpha = 0.01
+    delta = 75
+
+    out = add_echo(data, alpha, delta, pattern)
+
+    expected = data.astype(np.float64)
+    for c in range(data.shape[1]):
+        echo = np.convolve(data[:, c], alpha * pattern)[: len(data) - delta]
+        expected[delta:, c] += echo
+    np.testing.assert_allclose(out, expected, atol=1e-5)
+
+
+def test_time_spread_head_only():
+    data = np.array([0.5, -0.5, 0.25, 0.0, 0.0, 0.0], dtype=np.float32)
+    pattern = np.array([1, -1], dtype=np.float32)
+    alpha = 0.5
+    delta = 1
+
+    out = add_echo(data, alpha, delta, pattern, full_track=False)
+
+    expected = np.array([0.5, -0.25, -0.25, 0.25, 0.0, 0.0], dtype=np.float32)
+    np.testing.assert_allclose(out, expected, atol=1e-6)
+
+
+def test_input_is_not_modified():
+    data = np.array([[1.0, -1.0], [0.5, -0.5], [0.0, 0.0]], dtype=np.float32)
+    original = data.copy()
+    add_echo(data, alpha=0.9, delta=1)
+    add_echo(data, alpha=0.9, delta=1, pattern=np.array([1, -1]))
+    np.testing.assert_array_equal(data, original)
 
+
+def test_watermark_to_bipolar_is_signed():
+    bipolar = watermark_to_bipolar("a5")
+    np.testing.assert_array_equal(bipolar, [1, -1, 1, -1, -1, 1, -1, 1])
+
+
+def test_single_tap_matches_add_echo():
+    rng = np.random.default_rng(3)
+    data = rng.uniform(-0.5, 0.5, size=(3000, 2)).astype(np.float32)
+    pattern = 2 * rng.integers(0, 2, size=32) - 1
+
+    np.testing.assert_allclose(
+        add_echoes(data, [(0.3, 40)]), add_echo(data, 0.3, 40), atol=1e-6
+    )
+    np.testing.assert_allclose(
+        add_echoes(data, [(0.05, 40, pattern)]),
+        add_echo(data, 0.05, 40, pattern),
+        atol=1e-5,
+    )
+    np.testing.assert_array_equal(
+        add_echoes(data, [(0.3, 40, None)]), add_echoes(data, [(0.3, 40)])
+    )
+
+
+def test_multi_tap_has_no_cross_echo_terms():
+    data = np.zeros(10, dtype=np.float32)
+    data[0] = 1.0
+
+    out = add_echoes(data, [(0.5, 2), (0.25, 3)])
+
+    expected = np.array([1.0, 0, 0.5, 0.25, 0, 0, 0, 0, 0, 0], dtype=np.float32)
     np.testing.assert_allclose(out, expected, atol=1e-7)
+
+
+def _shifted_sum(data, taps):
+    expected = data.astype(np.float64)
+    for alpha, delta in taps:
+        expected[delta:] += alpha * data[:-delta]
+    return expected
+
+
+@pytest.mark.parametrize("count", [4, 12])
+def test_multi_tap_sparse_and_dense_paths(count):
+    rng = np.random.default_rng(4)
+    data = rng.uniform(-0.1, 0.1, size=2000).astype(np.float32)
+    taps = [(0.01 * (i + 1), 25 + 7 * i) for i in range(count)]
+
+    out = add_echoes(data, taps)
+
+    np.testing.assert_allclose(out, _shifted_sum(data, taps), atol=1e-6)
+    np.testing.assert_array_equal(out, add_echoes(data, taps[::-1]))
+
+
+def test_empty_taps_return_input():
+    data = np.ones(4, dtype=np.float32)
+    assert add_echoes(data, [(0.0, 3), (0.5, 0)]) is data
@@ -0,0 +1,47 @@
+import numpy as np
+import soundfile as sf
+
+from src.logic.experiments import (
+    corpus_tracks,
+    parameter_grid,
+    run_experiments,
+    save_results,
+    summarize,
+)
+
+
+def test_parameter_grid_collapses_pattern_length_for_simple_echo():
+    grid = parameter_grid(
+        [0.1], [50], [256, 1024], ["simple", "time-spread"], [4.0], [5.0]
+    )
+
+    assert len(grid) == 3
+    assert [point["pattern_length"] for point in grid] == [0, 256, 1024]
+
+
+def test_run_experiments_reports_detection_rates(tmp_path):
+    rng = np.random.default_rng(0)
+    for i in range(2):
+        sf.write(tmp_path / f"track_{i}.wav", 0.1 * rng.normal(size=16_000), 8000)
+    grid = parameter_grid([0.05], [75], [512], ["time-spread"], [4.0, 100.0], [5.0])
+    calls = []
+
+    results = run_experiments(
+        corpus_tracks(tmp_path),
+        grid,
+        workers=2,
+        progress=lambda done, total: calls.append((done, total)),
+    )
+    summary = summarize(results)
+
+    assert len(results) == 2 * 2 * 2
+    assert calls[-1] == (2, 2)
+    strict = summary[summary["sigma_factor"] == 100.0].iloc[0]
+    default = summary[summary["sigma_factor"] == 4.0].iloc[0]
+    assert default["true_positive_rate"] == 1.0
+    assert default["false_positive_rate"] == 0.0
+    assert default["delay_accuracy"] == 1.0
+    assert strict["true_positive_rate"] == 0.0
+
+    path = save_results(results, tmp_path / "results.parquet")
+    assert path.exists()
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.logic.batch import detect_file
+from src.logic.embed import embed_echo
+from src.logic.features import FeatureStore
+from src.logic.registry import WatermarkRegistry
+
+
+def _write(path, seed, watermark=None):
+    audio = 0.1 * np.random.default_rng(seed).normal(size=(32_000, 2))
+    if watermark is not None:
+        audio = embed_echo(audio, 0.05, 75, watermark)
+    sf.write(path, audio, 16_000, subtype="FLOAT")
+
+
+def test_store_appends_rows_across_shards(tmp_path):
+    with FeatureStore(tmp_path, length=8, chunk_rows=2) as store:
+        for i in range(5):
+            store.put(f"d{i}", np.full(8, i, dtype=np.float32), 16_000, 1)
+        store.put("d0", np.zeros(8), 8000, 1)
+
+    with FeatureStore(tmp_path, length=8, chunk_rows=2) as store:
+        cepstrum, rate = store.get("d3")
+        assert len(store) == 5
+        assert np.all(cepstrum == 3) and rate == 16_000
+        assert store.get("missing") is None
+        assert not cepstrum.flags.writeable
+    assert len(list(tmp_path.glob("shard_*.npy"))) == 3
+    with pytest.raises(ValueError):
+        FeatureStore(tmp_path, length=16)
+    with pytest.raises(ValueError):
+        FeatureStore(tmp_path, length=8, frame_size=4096)
+    with pytest.raises(ValueError):
+        FeatureStore(tmp_path, length=8, dtype=np.float64)
+
+
+def test_files_are_indexed_once_by_content(tmp_path):
+    _write(tmp_path / "a.wav", 0)
+    sf.write(tmp_path / "copy.wav", sf.read(tmp_path / "a.wav")[0], 16_000, "FLOAT")
+
+    with FeatureStore(tmp_path / "features") as store:
+        first, added = store.add_file(tmp_path / "a.wav")
+        again, added_again = store.add_file(tmp_path / "a.wav")
+        copy, added_copy = store.add_file(tmp_path / "copy.wav")
+
+    assert added and not added_again and not added_copy
+    assert first == again == copy
+
+
+def test_detection_from_features_matches_audio(tmp_path):
+    watermark = np.random.default_rng(1).bytes(128).hex()
+    _write(tmp_path / "marked.wav", 0, watermark)
+    with WatermarkRegistry(tmp_path / "registry") as keys:
+        keys.add(watermark, "marked")
+        keys.issue("other")
+    features = str(tmp_path / "features")
+    kwargs = {"watermark": watermark, "lag_range": (10, 301)}
+    registered = {"registry": str(tmp_path / "registry"), "lag_range": (10, 301)}
+
+    direct = detect_file(str(tmp_path / "marked.wav"), **kwargs)
+    stored = detect_file(str(tmp_path / "marked.wav"), features=features, **kwargs)
+    found = detect_file(str(tmp_path / "marked.wav"), features=features, **registered)
+
+    assert stored["detected"] and direct["detected"]
+    assert stored["peak_index"] == direct["peak_index"] == 75
+    assert stored["z_score"] == pytest.approx(direct["z_score"], rel=1e-3)
+    assert found["asset"] == "marked"
+    with pytest.raises(ValueError):
+        detect_file(
+            str(tmp_path / "marked.wav"), features=features, watermark=watermark
+        )
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from src.logic.payload import crc8, decode_payload, embed_payload, encode_payload
+
+
+def _noise(seconds: float = 40.0, rate: int = 16_000, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (0.1 * rng.normal(size=int(seconds * rate))).astype(np.float32)
+
+
+def test_encode_payload_appends_crc_and_repeats():
+    coded = encode_payload("a5", repeats=2)
+
+    assert len(coded) == 32
+    assert np.array_equal(coded[:16], coded[16:])
+    assert np.packbits(coded[8:16])[0] == crc8(b"\xa5")
+
+
+def test_payload_roundtrip_mono_and_stereo():
+    audio = _noise()
+    stereo = np.stack([audio, _noise(seed=1)], axis=1)
+
+    mono = decode_payload(embed_payload(audio, "c0de"), bits=16)
+    both = decode_payload(embed_payload(stereo, "beef"), bits=16)
+
+    assert mono["payload"] == "c0de" and mono["valid"]
+    assert mono["disagreements"] == 0
+    assert both["payload"] == "beef" and both["valid"]
+    assert both["bits"].shape == (16,)
+
+
+def test_clean_audio_fails_crc():
+    result = decode_payload(_noise(seed=2), bits=16)
+
+    assert not result["valid"]
+
+
+def test_payload_needs_enough_audio():
+    with pytest.raises(ValueError, match="too short"):
+        embed_payload(_noise(seconds=2.0), "c0de")
@@ -0,0 +1,81 @@
+import threading
+import tracemalloc
+
+import numpy as np
+
+from src.logic.detect import detect_watermark
+from src.logic.embed import embed_echo, generate_watermark
+from src.logic.profiling import profiled, record, stage
+
+
+def test_stages_are_recorded_only_inside_profiled():
+    with stage("idle") as entry:
+        assert entry is None
+
+    with profiled() as profiler:
+        with stage("allocate") as entry:
+            data = np.ones(100_000)
+            record(entry, data, peak_value=1.0)
+        with profiled() as inner:
+            with stage("inner"):
+                pass
+
+    assert [s["stage"] for s in inner.stages] == ["inner"]
+    assert [s["stage"] for s in profiler.stages] == ["allocate", "inner"]
+    allocate = profiler.stages[0]
+    assert allocate["array_bytes"] == data.nbytes
+    assert allocate["allocated_bytes"] >= data.nbytes
+    assert allocate["shape"] == (100_000,)
+    assert allocate["peak_value"] == 1.0
+    assert list(profiler.table().columns[:3]) == ["stage", "seconds", "allocated_bytes"]
+
+
+def test_nested_stage_keeps_peak_of_enclosing_stage():
+    with profiled() as profiler:
+        with stage("outer"):
+            data = np.ones(1_000_000)
+            del data
+            with stage("inner"):
+                pass
+
+    stages = {entry["stage"]: entry for entry in profiler.stages}
+    assert stages["outer"]["allocated_bytes"] >= 8_000_000
+    assert stages["inner"]["allocated_bytes"] < 8_000_000
+
+
+def test_tracing_stops_after_last_profiled_block():
+    entered, release = threading.Event(), threading.Event()
+
+    def other():
+        with profiled():
+            entered.set()
+            release.wait()
+
+    thread = threading.Thread(target=other)
+    try:
+        with profiled():
+            thread.start()
+            entered.wait()
+        assert tracemalloc.is_tracing()
+    finally:
+        release.set()
+        thread.join()
+    assert not tracemalloc.is_tracing()
+
+
+def test_detect_watermark_reports_performance_when_instrumented():
+    watermark = generate_watermark(256)
+    audio = 0.1 * np.random.default_rng(0).normal(size=32_000)
+    marked = embed_echo(audio, alpha=0.05, delta=75, watermark=watermark)
+
+    plain = detect_watermark(marked, 16_000, expected_watermark_hex=watermark)
+    result = detect_watermark(
+        marked, 16_000, expected_watermark_hex=watermark, instrument=True
+    )
+
+    assert "performance" not in plain
+    assert result["detected"] == plain["detected"]
+    stages = {entry["stage"]: entry for entry in result["performance"]}
+    assert {"cepstrum", "correlate", "score"} <= set(stages)
+    assert stages["score"]["peak_value"] == result["peak_value"]
+    assert stages["cepstrum"]["input_bytes"] == marked.nbytes
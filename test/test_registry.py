@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.logic.detect import detect_registered
+from src.logic.embed import embed_echo, generate_watermark, watermark_to_bipolar
+from src.logic.registry import WatermarkRegistry
+
+
+def test_issue_and_lookup(tmp_path):
+    with WatermarkRegistry(tmp_path) as registry:
+        watermark = registry.issue("track.wav", {"artist": "Brahms"})
+        record = registry.lookup(watermark)
+
+    assert record["row"] == 0
+    assert record["asset"] == "track.wav"
+    assert record["metadata"] == {"artist": "Brahms"}
+
+
+def test_patterns_are_precomputed_bipolar(tmp_path):
+    keys = [generate_watermark(1024) for _ in range(5)]
+    with WatermarkRegistry(tmp_path) as registry:
+        registry.add_many(keys, [f"asset_{i}" for i in range(5)])
+        patterns = registry.patterns()
+
+    assert patterns.shape == (5, 1024)
+    for key, pattern in zip(keys, patterns):
+        np.testing.assert_array_equal(pattern, watermark_to_bipolar(key))
+
+
+def test_registry_persists_between_sessions(tmp_path):
+    with WatermarkRegistry(tmp_path, bits=64) as registry:
+        first = registry.issue("a")
+    with WatermarkRegistry(tmp_path) as registry:
+        second = registry.issue("b")
+        assert registry.bits == 64
+        assert registry.watermarks() == [first, second]
+        assert registry.packed().shape == (2, 8)
+
+
+def test_duplicate_key_is_rejected(tmp_path):
+    watermark = generate_watermark(1024)
+    with WatermarkRegistry(tmp_path) as registry:
+        registry.add(watermark, "a")
+        with pytest.raises(Exception):
+            registry.add(watermark, "b")
+        assert len(registry) == 1
+        assert registry.packed().shape == (1, 128)
+
+
+def test_wrong_key_length_is_rejected(tmp_path):
+    with WatermarkRegistry(tmp_path) as registry:
+        with pytest.raises(ValueError):
+            registry.add(generate_watermark(64), "a")
+
+
+def test_detect_registered_finds_asset(tmp_path):
+    rng = np.random.default_rng(0)
+    audio = rng.normal(size=32_000).astype(np.float32)
+    audio /= np.max(np.abs(audio))
+    with WatermarkRegistry(tmp_path) as registry:
+        keys = [registry.issue(f"asset_{i}") for i in range(30)]
+    marked = embed_echo(audio, alpha=0.05, delta=75, watermark=keys[12])
+
+    table = detect_registered(
+        marked, 16_000, tmp_path, top=5, key_batch=8, lag_range=(10, 300)
+    )
+
+    assert len(table) == 5
+    assert table.loc[0, "asset"] == "asset_12"
+    assert table.loc[0, "watermark"] == keys[12]
+    assert table.loc[0, "detected"]
+    assert table.loc[0, "peak_index"] == 75
+
+
+def test_detect_registered_defaults_to_embed_delta_range(tmp_path):
+    rng = np.random.default_rng(1)
+    audio = rng.normal(size=32_000).astype(np.float32)
+    audio /= np.max(np.abs(audio))
+    with WatermarkRegistry(tmp_path) as registry:
+        keys = [registry.issue(f"asset_{i}") for i in range(4)]
+    marked = embed_echo(audio, alpha=0.05, delta=75, watermark=keys[2])
+
+    table = detect_registered(marked, 16_000, tmp_path, top=None)
+    bounded = detect_registered(marked, 16_000, tmp_path, top=None, lag_range=(10, 301))
+
+    pd.testing.assert_frame_equal(table, bounded)
@@ -0,0 +1,93 @@
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.logic.detect import compute_cepstrum, lag_segment  # noqa: E402
+from src.logic.embed import embed_echo, generate_watermark  # noqa: E402
+from src.service import create_app  # noqa: E402
+from src.service.batching import DetectionBatcher  # noqa: E402
+
+
+def _wav(audio: np.ndarray, rate: int = 16_000) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, rate, format="WAV", subtype="FLOAT")
+    return buffer.getvalue()
+
+
+def _noise(seed: int = 0) -> np.ndarray:
+    return 0.1 * np.random.default_rng(seed).normal(size=32_000)
+
+
+def test_batcher_merges_concurrent_requests_into_one_correlation():
+    keys = tuple(generate_watermark(256) for _ in range(3))
+    segments = []
+    for seed, key in enumerate(keys):
+        marked = embed_echo(_noise(seed), alpha=0.05, delta=75, watermark=key)
+        segment, offset = lag_segment(compute_cepstrum(marked), 256, (10, 301))
+        segments.append(segment)
+
+    async def run():
+        with ThreadPoolExecutor(1) as pool:
+            batcher = DetectionBatcher(pool, max_batch=8, max_wait=0.05)
+            results = await asyncio.gather(
+                *(batcher.submit(segment, offset, keys, top=1) for segment in segments)
+            )
+        return results, batcher.metrics.snapshot()
+
+    results, metrics = asyncio.run(run())
+
+    assert [rows[0]["watermark"] for rows in results] == list(keys)
+    assert all(rows[0]["detected"] and rows[0]["peak_index"] == 75 for rows in results)
+    assert metrics["counters"]["batches"] == 1
+    assert metrics["observations"]["batch_size"]["max"] == 3
+
+
+def test_service_embeds_and_detects_with_registry(tmp_path):
+    app = create_app(registry=str(tmp_path / "registry"), workers=2)
+    with TestClient(app) as client:
+        embedded = client.post(
+            "/embed", params={"alpha": 0.05, "asset": "song"}, content=_wav(_noise())
+        )
+        watermark = embedded.headers["X-Watermark"]
+        found = client.post("/detect", content=embedded.content)
+        clean = client.post(
+            "/detect", params={"watermark": watermark}, content=_wav(_noise(1))
+        )
+        empty = client.post("/detect", content=b"")
+        metrics = client.get("/metrics").json()
+
+    assert embedded.status_code == 200
+    assert found.json()["detected"]
+    assert found.json()["matches"][0]["asset"] == "song"
+    assert found.json()["matches"][0]["watermark"] == watermark
+    assert not clean.json()["detected"]
+    assert empty.status_code == 400
+    assert metrics["counters"]["detections"] == 2
+    assert metrics["observations"]["cepstrum_s"]["count"] == 2
+
+
+def test_service_rejects_invalid_detect_parameters():
+    app = create_app(workers=1)
+    with TestClient(app) as client:
+        responses = [
+            client.post("/detect", params=params, content=_wav(_noise()))
+            for params in [
+                {"watermark": "zz" * 8},
+                {"watermark": "abc"},
+                {"watermark": "9f3c", "min_delta": 300, "max_delta": 10},
+                {"watermark": "9f3c", "min_delta": -1},
+                {"watermark": "9f3c", "top": 0},
+            ]
+        ]
+        metrics = client.get("/metrics").json()
+
+    assert [response.status_code for response in responses] == [422] * 5
+    assert "detections" not in metrics["counters"]
@@ -0,0 +1,61 @@
+import logging
+from types import SimpleNamespace
+
+import numpy as np
+import soundfile as sf
+
+from src.logic.detect import detect_segments
+from src.logic.embed import embed_echo
+from src.logic.streaming import InputQueue, StreamingDetector, iter_file_blocks
+
+
+def _partly_marked(watermark: str, rate: int = 16_000) -> np.ndarray:
+    audio = (0.1 * np.random.default_rng(0).normal(size=12 * rate)).astype(np.float32)
+    marked = embed_echo(audio[4 * rate : 9 * rate], 0.05, 75, watermark)
+    audio[4 * rate : 9 * rate] = marked
+    return audio
+
+
+def test_streaming_matches_offline_segments():
+    watermark = np.random.default_rng(1).bytes(32).hex()
+    audio = _partly_marked(watermark)
+    detector = StreamingDetector(16_000, expected_watermark_hex=watermark)
+
+    rows = []
+    for i in range(0, len(audio), 1000):
+        rows.extend(detector.process(audio[i : i + 1000]))
+    offline = detect_segments(audio, 16_000, expected_watermark_hex=watermark)
+
+    windows = offline["windows"]
+    assert len(rows) == len(windows)
+    assert np.allclose([row["z_score"] for row in rows], windows["z_score"])
+    assert [row["detected"] for row in rows] == windows["detected"].tolist()
+
+
+def test_streaming_events_from_file_blocks(tmp_path):
+    watermark = np.random.default_rng(1).bytes(32).hex()
+    path = tmp_path / "stream.wav"
+    sf.write(path, _partly_marked(watermark), 16_000)
+    detector = StreamingDetector(16_000, expected_watermark_hex=watermark)
+
+    events = list(detector.events(iter_file_blocks(path)))
+
+    assert [event["event"] for event in events] == ["start", "end"]
+    assert events[0]["peak_index"] == 75
+    assert 2.0 <= events[0]["start_s"] <= 4.5
+    assert 7.0 <= events[1]["start_s"] <= 9.5
+
+
+def test_input_queue_drops_blocks_when_full(caplog):
+    blocks = InputQueue(maxsize=2)
+    for i, overflow in enumerate([False, False, True]):
+        status = SimpleNamespace(input_overflow=overflow)
+        blocks.callback(np.full((4, 1), i, dtype=np.float32), 4, None, status)
+
+    with caplog.at_level(logging.WARNING):
+        first = blocks.get()
+        blocks.get()
+
+    assert first[0, 0] == 0
+    assert (blocks.dropped, blocks.overflows) == (1, 1)
+    assert len(caplog.records) == 1
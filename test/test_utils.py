@@ -1,6 +1,16 @@
 import numpy as np
+import pytest
+import soundfile as sf
 
-from src.logic.utils import normalize_audio
+from src.logic.utils import (
+    audio_to_mp3_buffer,
+    audio_to_opus_buffer,
+    averaged_cepstrum,
+    cepstrum,
+    iter_cepstrum_frames,
+    normalize_audio,
+    to_int16,
+)
 
 
 def test_mono_normalization():
@@ -39,3 +49,62 @@ def test_dtype_float32():
 
     assert normalized.dtype == np.float32
     assert normalized.shape == audio.shape
+
+
+def test_single_frame_cepstrum_matches_full_cepstrum():
+    rng = np.random.default_rng(0)
+    audio = rng.normal(size=1024)
+
+    frames = list(iter_cepstrum_frames(audio, frame_size=1024, window="boxcar"))
+
+    assert len(frames) == 1
+    np.testing.assert_allclose(frames[0], cepstrum(audio), atol=1e-9)
+
+
+def test_cepstrum_frames_count():
+    audio = np.zeros(10_000)
+    frames = list(iter_cepstrum_frames(audio, frame_size=1024, hop=512, batch=3))
+
+    assert len(frames) == 1 + (10_000 - 1024) // 512
+    assert all(frame.shape == (1024,) for frame in frames)
+
+
+def test_short_signal_is_padded_to_one_frame():
+    frames = list(iter_cepstrum_frames(np.ones(100), frame_size=256))
+    assert len(frames) == 1
+
+
+def test_frame_size_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        list(iter_cepstrum_frames(np.zeros(5000), frame_size=3000))
+
+
+def test_averaged_cepstrum_shows_echo_peak():
+    rng = np.random.default_rng(1)
+    audio = rng.normal(size=48_000).astype(np.float32)
+    delta = 120
+    audio[delta:] += 0.5 * audio[:-delta].copy()
+
+    ceps = averaged_cepstrum(audio, frame_size=2048)
+
+    assert ceps.shape == (2048,)
+    assert np.argmax(ceps[20:500]) + 20 == delta
+
+
+def test_to_int16_clips_instead_of_wrapping():
+    samples = to_int16(np.array([1.5, 1.0, -1.0, -2.0, 0.5]))
+
+    assert samples.tolist() == [32767, 32767, -32767, -32767, 16384]
+
+
+def test_previews_are_encoded_in_memory():
+    t = np.arange(44100) / 44100
+    audio = 1.2 * np.sin(2 * np.pi * 440 * t)
+
+    mp3, rate = sf.read(audio_to_mp3_buffer(audio, 44100))
+    opus, opus_rate = sf.read(audio_to_opus_buffer(audio, 44100))
+
+    assert rate == 44100
+    assert abs(len(mp3) - len(audio)) < 2000
+    assert np.max(np.abs(mp3)) > 0.9
+    assert opus_rate == 24000